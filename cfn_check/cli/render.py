@@ -1,12 +1,14 @@
 import pathlib
+import sys
 from typing import Any
 from async_logging import LogLevelName, Logger, LoggingConfig
 from cocoa.cli import CLI, YamlFile
 from cfn_check.yaml.comments import CommentedMap
 
 from cfn_check.cli.utils.files import load_templates, write_to_file
+from cfn_check.cli.utils.server import send_request
 from cfn_check.cli.utils.stdout import write_to_stdout, write_multiple_files_to_stdout
-from cfn_check.rendering import Renderer
+from cfn_check.rendering import Renderer, RenderMode
 from cfn_check.logging.models import InfoLog
 from .config import Config
 
@@ -23,6 +25,8 @@ async def render(
     mappings: list[str] | None = None,
     parameters: list[str] | None = None,
     references: list[str] | None = None,
+    render_mode: RenderMode = 'tree',
+    server: str | None = None,
     log_level: LogLevelName = 'info',
 ):
     """
@@ -31,12 +35,14 @@ async def render(
     @param attributes A list of <key>=<value> k/v strings for !GetAtt calls to use
     @param availability-zones A list of <availability_zone> strings for !GetAZs calls to use
     @param config A CFN-Check yaml config file
-    @param exclude_paths A list of string paths to ignore
+    @param exclude_paths A list of paths or globs (*, ?, [...] and **) to ignore
     @param import-values A list of <filepath>=<export_value> k/v strings for !ImportValue 
     @param mappings A list of <key>=<value> k/v string specifying which Mappings to use
     @param output-path Path to output the rendered CloudFormation templates to
     @param parameters A list of <key>=<value> k/v string for Parameters to use
     @param references A list of <key>=<value> k/v string for !Ref values to use
+    @param render-mode Resolve intrinsics by walking the tree or in dependency graph order
+    @param server Path to the socket of a running cfn-check serve to render with
     @param log-level The log level to use
     """
     
@@ -114,6 +120,35 @@ async def render(
 
     exclude_paths.append(config.value)
 
+    if server:
+        response = await send_request(
+            server,
+            'render',
+            paths=paths,
+            exclude_paths=exclude_paths,
+            output_path=output_path,
+            attributes=parsed_attributes,
+            availability_zones=availability_zones,
+            mappings=parsed_mappings,
+            parameters=parsed_parameters,
+            references=parsed_references,
+            render_mode=render_mode,
+        )
+
+        for rendered in response.get('rendered', []):
+            await logger.log(InfoLog(message=f'✅ {rendered} template rendered'))
+
+        if output := response.get('output'):
+            sys.stdout.write(output)
+
+        if config_data:
+            await write_to_file(
+                config.value,
+                config_data.model_dump(),
+            )
+
+        return
+
     templates = await load_templates(
         paths,
         exclude=exclude_paths,
@@ -126,7 +161,7 @@ async def render(
     for template in templates:
 
         filepath, template = template
-        renderer = Renderer()
+        renderer = Renderer(mode=render_mode)
         
         rendered = renderer.render(
             template,
@@ -8,6 +8,7 @@ from cocoa.ui.components.header import Header, HeaderConfig
 from cocoa.ui.components.terminal import Terminal, EngineConfig
 
 from .render import render
+from .serve import serve
 from .validate import validate
 from .version import version
 
@@ -51,6 +52,7 @@ async def create_header(
 
 @CLI.root( 
     render, 
+    serve,
     validate,
     version,
     global_styles=CLIStyle(
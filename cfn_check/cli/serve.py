@@ -0,0 +1,34 @@
+from async_logging import LogLevelName, Logger, LoggingConfig
+from cocoa.cli import CLI
+
+from cfn_check.cli.utils.server import DEFAULT_SOCKET_PATH, ValidationServer
+
+
+@CLI.command()
+async def serve(
+    socket_path: str = DEFAULT_SOCKET_PATH,
+    cache_dir: str | None = None,
+    log_level: LogLevelName = 'info',
+):
+    '''
+    Serve validate and render requests over a Unix socket
+
+    @param socket-path Path of the Unix socket to listen on
+    @param cache-dir Directory to cache parsed templates in between runs
+    @param log-level The log level to use
+    '''
+
+    logging_config = LoggingConfig()
+    logging_config.update(
+        log_level=log_level,
+        log_output='stderr',
+    )
+
+    logger = Logger()
+
+    server = ValidationServer(
+        socket_path=socket_path,
+        cache_dir=cache_dir,
+    )
+
+    await server.serve(logger)
@@ -0,0 +1,332 @@
+import datetime
+import functools
+import hashlib
+import importlib.metadata
+import os
+import pickle
+import tempfile
+from typing import Any
+from cfn_check.yaml.comments import (
+    CommentedMap,
+    CommentedSeq,
+    TaggedScalar,
+)
+from cfn_check.yaml.scalarstring import (
+    DoubleQuotedScalarString,
+    FoldedScalarString,
+    LiteralScalarString,
+    PlainScalarString,
+    ScalarString,
+    SingleQuotedScalarString,
+)
+from cfn_check.yaml.tag import Tag
+
+from cfn_check.evaluation.result_cache import ResultCache
+from cfn_check.shared.types import YamlObject
+
+
+CACHE_FORMAT = 1
+
+
+class NodeKind:
+    MAP = 0
+    SEQ = 1
+    TAGGED = 2
+    STRING = 3
+
+
+STRING_TYPES: tuple[type[ScalarString], ...] = (
+    SingleQuotedScalarString,
+    DoubleQuotedScalarString,
+    LiteralScalarString,
+    FoldedScalarString,
+    PlainScalarString,
+)
+
+STRING_TYPE_INDEX = {
+    string_type: idx for idx, string_type in enumerate(STRING_TYPES)
+}
+
+TagEntry = tuple[Any, Any, Any, bool | None]
+
+# The only classes a cached template can contain besides builtins.
+# Plain scalars are stored as builtins, and the rare ruamel scalar
+# types pickle along with their formatting attributes and anchors.
+PICKLED_MODULES = {
+    'cfn_check.yaml.anchor',
+    'cfn_check.yaml.scalarbool',
+    'cfn_check.yaml.scalarfloat',
+    'cfn_check.yaml.scalarint',
+    'cfn_check.yaml.scalarstring',
+    'cfn_check.yaml.timestamp',
+}
+
+PICKLED_DATETIME_TYPES = {
+    'date',
+    'datetime',
+    'time',
+    'timedelta',
+    'timezone',
+}
+
+
+class TemplateUnpickler(pickle.Unpickler):
+    '''
+    Unpickles cached templates, refusing any class other than the
+    ruamel scalar types and datetimes a template can contain, so
+    an entry can't name a callable to run as it's loaded.
+    '''
+
+    def find_class(
+        self,
+        module: str,
+        name: str,
+    ):
+        if module == 'datetime' and name in PICKLED_DATETIME_TYPES:
+            return getattr(datetime, name)
+
+        if module in PICKLED_MODULES and isinstance(
+            found := super().find_class(module, name),
+            type,
+        ):
+            return found
+
+        raise pickle.UnpicklingError(f'{module}.{name} is not allowed in cached templates')
+
+
+@functools.cache
+def get_version() -> str:
+    try:
+        return importlib.metadata.version('cfn-check')
+
+    except importlib.metadata.PackageNotFoundError:
+        return 'unknown'
+
+
+def get_cache_key(
+    content: bytes,
+    typ: str = 'rt',
+) -> str:
+    digest = hashlib.blake2b(
+        content,
+        digest_size=20,
+    )
+
+    digest.update(
+        f'{get_version()}:{CACHE_FORMAT}:{typ}'.encode(),
+    )
+
+    return digest.hexdigest()
+
+
+def create_result_cache(
+    cache_dir: str,
+    flags: list[str] | None = None,
+) -> ResultCache:
+    # Results from other cfn-check versions or flags
+    # (i.e. render modes) are never reused.
+    return ResultCache(
+        cache_dir,
+        context=[
+            get_version(),
+            *sorted(flags or []),
+        ],
+    )
+
+
+def get_template_hash(content: bytes) -> str:
+    return hashlib.blake2b(
+        content,
+        digest_size=20,
+    ).hexdigest()
+
+
+def encode_template(template: YamlObject):
+    '''
+    Convert a loaded template into nested tuples of builtins.
+    Tags are stored once in a table and referenced by index.
+    Comments and line/column info are not kept.
+    '''
+    tags: list[TagEntry] = []
+    tag_indexes: dict[TagEntry, int] = {}
+
+    def encode_tag(node: Any):
+        tag = getattr(node, Tag.attrib, None)
+        if tag is None or tag.suffix is None:
+            return -1
+
+        entry: TagEntry = (
+            tag.handle,
+            tag.suffix,
+            tuple(tag.handles.items()) if tag.handles else None,
+            tag._transform_type,
+        )
+
+        if (idx := tag_indexes.get(entry)) is None:
+            idx = len(tags)
+            tag_indexes[entry] = idx
+            tags.append(entry)
+
+        return idx
+
+    def encode(node: Any):
+        if isinstance(node, CommentedMap):
+            items: list[Any] = []
+            for key, value in node.items():
+                items.append(encode(key))
+                items.append(encode(value))
+
+            return (NodeKind.MAP, encode_tag(node), tuple(items))
+
+        elif isinstance(node, CommentedSeq):
+            return (
+                NodeKind.SEQ,
+                encode_tag(node),
+                tuple([encode(item) for item in node]),
+            )
+
+        elif isinstance(node, TaggedScalar):
+            return (
+                NodeKind.TAGGED,
+                encode_tag(node),
+                node.style,
+                encode(node.value),
+            )
+
+        elif (
+            string_type := STRING_TYPE_INDEX.get(type(node))
+        ) is not None and node.yaml_anchor(any=True) is None:
+            return (NodeKind.STRING, string_type, str(node))
+
+        # Plain scalars are stored as-is, as are the rare ruamel
+        # scalar types (ScalarInt, ScalarFloat, timestamps, ...)
+        # which pickle along with their formatting attributes.
+        return node
+
+    encoded = encode(template)
+
+    return (tags, encoded)
+
+
+def decode_template(tags: list[TagEntry], encoded: Any) -> YamlObject:
+    def decode_tag(node: Any, idx: int):
+        if idx < 0:
+            return
+
+        handle, suffix, handles, transform_type = tags[idx]
+
+        tag = Tag(
+            handle=handle,
+            suffix=suffix,
+            handles=dict(handles) if handles else None,
+        )
+        tag._transform_type = transform_type
+
+        node.yaml_set_ctag(tag)
+
+    def decode(node: Any):
+        if not isinstance(node, tuple):
+            return node
+
+        match node[0]:
+            case NodeKind.MAP:
+                _, tag, items = node
+                decoded = CommentedMap()
+                for idx in range(0, len(items), 2):
+                    decoded[decode(items[idx])] = decode(items[idx + 1])
+
+                decode_tag(decoded, tag)
+                return decoded
+
+            case NodeKind.SEQ:
+                _, tag, items = node
+                decoded = CommentedSeq([
+                    decode(item) for item in items
+                ])
+
+                decode_tag(decoded, tag)
+                return decoded
+
+            case NodeKind.TAGGED:
+                _, tag, style, value = node
+                decoded = TaggedScalar(
+                    value=decode(value),
+                    style=style,
+                )
+
+                decode_tag(decoded, tag)
+                return decoded
+
+            case NodeKind.STRING:
+                _, string_type, value = node
+                return STRING_TYPES[string_type](value)
+
+        return node
+
+    return decode(encoded)
+
+
+def load_cached_template(
+    cache_dir: str,
+    key: str,
+) -> YamlObject | None:
+    '''
+    Load a cached template, or None on a miss. Entries are unpickled
+    with a TemplateUnpickler, so a cache dir shared with others (or
+    restored in CI) can't run code as it's read. It's still trusted
+    to hold the templates it was written for, as entries are looked
+    up by content hash rather than checked against the file.
+    '''
+    try:
+        with open(os.path.join(cache_dir, f'{key}.pickle'), 'rb') as cached:
+            (cache_format, tags, encoded) = TemplateUnpickler(cached).load()
+
+        if cache_format != CACHE_FORMAT:
+            return None
+
+        return decode_template(tags, encoded)
+
+    except FileNotFoundError:
+        return None
+
+    except Exception:
+        # Corrupt, truncated or disallowed entries, and those
+        # left by other cfn-check versions, are treated as misses
+        # and overwritten once the template is re-parsed.
+        return None
+
+
+def store_cached_template(
+    cache_dir: str,
+    key: str,
+    template: YamlObject,
+):
+    os.makedirs(cache_dir, exist_ok=True)
+
+    (tags, encoded) = encode_template(template)
+
+    # Write to a temporary file and rename so concurrent
+    # runs (or workers) never read a partial entry.
+    (fd, temp_path) = tempfile.mkstemp(
+        dir=cache_dir,
+        suffix='.tmp',
+    )
+
+    try:
+        with os.fdopen(fd, 'wb') as cached:
+            pickle.dump(
+                (CACHE_FORMAT, tags, encoded),
+                cached,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+
+        os.replace(
+            temp_path,
+            os.path.join(cache_dir, f'{key}.pickle'),
+        )
+
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+        raise
@@ -0,0 +1,147 @@
+from __future__ import annotations
+import os
+from fnmatch import fnmatchcase
+
+
+GLOB_CHARS = ('*', '?', '[')
+
+ExcludeState = tuple['ExcludeTrieNode', ...]
+
+
+def split_path(path: str) -> list[str]:
+    return [
+        component
+        for component in os.path.abspath(path).split(os.sep)
+        if component
+    ]
+
+
+class ExcludeTrieNode:
+
+    __slots__ = (
+        'literals',
+        'globs',
+        'recursive',
+        'is_recursive',
+        'terminal',
+    )
+
+    def __init__(
+        self,
+        is_recursive: bool = False,
+    ):
+        self.literals: dict[str, ExcludeTrieNode] = {}
+        self.globs: dict[str, ExcludeTrieNode] = {}
+        self.recursive: ExcludeTrieNode | None = None
+        self.is_recursive = is_recursive
+        self.terminal = False
+
+
+class ExcludeTrie:
+    '''
+    Exclude paths compiled into a trie of absolute path components.
+    A path is excluded if it, or any directory above it, matches an
+    exclude. Components may be globs (`*`, `?`, `[...]`) matching a
+    single component, or `**` matching any number of components.
+    '''
+
+    def __init__(
+        self,
+        excludes: list[str],
+    ):
+        self.root = ExcludeTrieNode()
+
+        for exclude in excludes:
+            node = self.root
+
+            for component in split_path(exclude):
+                if component == '**':
+                    if node.recursive is None:
+                        node.recursive = ExcludeTrieNode(is_recursive=True)
+
+                    node = node.recursive
+
+                elif any(char in component for char in GLOB_CHARS):
+                    node = node.globs.setdefault(component, ExcludeTrieNode())
+
+                else:
+                    node = node.literals.setdefault(component, ExcludeTrieNode())
+
+            node.terminal = True
+
+        self.initial: ExcludeState = self._closure([self.root])
+
+    def __bool__(self):
+        return bool(
+            self.root.literals or self.root.globs or self.root.recursive
+        )
+
+    def state(self, path: str) -> ExcludeState:
+        state = self.initial
+        for component in split_path(path):
+            if not state or self.is_excluded(state):
+                break
+
+            state = self.advance(state, component)
+
+        return state
+
+    def excludes(self, path: str) -> bool:
+        return self.is_excluded(
+            self.state(path),
+        )
+
+    def is_excluded(self, state: ExcludeState) -> bool:
+        for node in state:
+            if node.terminal:
+                return True
+
+        return False
+
+    def advance(
+        self,
+        state: ExcludeState,
+        component: str,
+    ) -> ExcludeState:
+        '''
+        Returns the trie nodes reached after matching one more path
+        component from the given state. An empty state means nothing
+        below the path can be excluded.
+        '''
+        reached: list[ExcludeTrieNode] = []
+
+        for node in state:
+            if node.is_recursive:
+                # `**` consumes this component and stays active
+                reached.append(node)
+
+            if (
+                child := node.literals.get(component)
+            ) is not None:
+                reached.append(child)
+
+            for pattern, child in node.globs.items():
+                if fnmatchcase(component, pattern):
+                    reached.append(child)
+
+        return self._closure(reached)
+
+    def _closure(
+        self,
+        nodes: list[ExcludeTrieNode],
+    ) -> ExcludeState:
+        # A `**` may also match zero components, so its node is
+        # active as soon as its parent is.
+        closure: dict[int, ExcludeTrieNode] = {}
+
+        while nodes:
+            node = nodes.pop()
+            if id(node) in closure:
+                continue
+
+            closure[id(node)] = node
+
+            if node.recursive is not None:
+                nodes.append(node.recursive)
+
+        return tuple(closure.values())
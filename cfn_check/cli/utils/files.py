@@ -3,29 +3,185 @@ import asyncio
 import os
 import pathlib
 from glob import glob
+from typing import Literal
 from cfn_check.yaml import YAML
+from cfn_check.yaml.cparser import CEventParserError
 from cfn_check.shared.types import YamlObject, Data
+from .excludes import ExcludeTrie
+from .cache import (
+    get_cache_key,
+    get_template_hash,
+    load_cached_template,
+    store_cached_template,
+)
+
+
+LoaderType = Literal['rt', 'fast']
+
+TEMPLATE_SUFFIXES = ('.yml', '.yaml')
+TEMPLATE_MARKER = b'AWSTemplateFormatVersion'
+SNIFF_CHUNK_SIZE = 64 * 1024
 
 
 def find_templates(path, file_pattern):
     return list(pathlib.Path(path).rglob(file_pattern))
 
+def walk_templates(
+    path: str,
+    suffixes: tuple[str, ...] = TEMPLATE_SUFFIXES,
+    exclude: ExcludeTrie | None = None,
+):
+    '''
+    Walk the tree under path once with os.scandir, returning every
+    file matching any of the suffixes. Entries are visited in name
+    order and symlinked directories aren't followed. If excludes are
+    given, paths are absolute and excluded directories are never
+    descended into.
+    '''
+    template_filepaths: list[str] = []
+
+    exclude_state = ()
+    if exclude:
+        path = os.path.abspath(path)
+        exclude_state = exclude.state(path)
+
+        if exclude.is_excluded(exclude_state):
+            return template_filepaths
+
+    directories = [(path, exclude_state)]
+
+    while directories:
+        directory, exclude_state = directories.pop()
+
+        try:
+            with os.scandir(directory) as scanned:
+                entries = sorted(scanned, key=lambda entry: entry.name)
+
+        except (FileNotFoundError, NotADirectoryError, PermissionError):
+            continue
+
+        subdirectories = []
+        for entry in entries:
+            entry_state = exclude_state
+            if exclude_state:
+                entry_state = exclude.advance(exclude_state, entry.name)
+
+                if exclude.is_excluded(entry_state):
+                    continue
+
+            if entry.is_dir(follow_symlinks=False):
+                subdirectories.append((entry.path, entry_state))
+
+            elif entry.name.endswith(suffixes) and entry.is_file():
+                template_filepaths.append(entry.path)
+
+        # Reversed so subdirectories pop off the stack in name order
+        directories.extend(reversed(subdirectories))
+
+    return template_filepaths
+
+def sniff_template(path: str) -> bool:
+    '''
+    Cheaply check whether a file could be a CloudFormation template by
+    scanning its bytes for the AWSTemplateFormatVersion key, so files
+    without it (k8s manifests, CI configs, ...) are never parsed.
+    '''
+    try:
+        with open(path, 'rb') as template:
+            overlap = b''
+            while chunk := template.read(SNIFF_CHUNK_SIZE):
+                if TEMPLATE_MARKER in overlap + chunk:
+                    return True
+
+                overlap = chunk[-(len(TEMPLATE_MARKER) - 1):]
+
+    except (FileNotFoundError, IsADirectoryError, PermissionError):
+        return False
+
+    return False
+
 def find_templates_with_no_basepath(pattern: str):
     return list(glob(pattern))
 
-def open_template(path: str) -> tuple[str, YamlObject] | None:
+def create_loader(
+    typ: LoaderType = 'rt',
+    pure: bool = False,
+):
+    loader = YAML(
+        typ=typ,
+        pure=pure,
+    )
+
+    if typ == 'rt':
+        loader.preserve_quotes = True
+        loader.indent(mapping=2, sequence=4, offset=2)
+
+    return loader
+
+def load_template(
+    content: str,
+    typ: LoaderType = 'rt',
+) -> YamlObject:
+    try:
+        return create_loader(typ).load(content)
+
+    except CEventParserError:
+        # The C parser rejects some templates the pure parser
+        # accepts (i.e. stacked tags like `!Base64 !Ref Value`).
+        return create_loader(typ, pure=True).load(content)
+
+def open_template(
+    path: str,
+    cache_dir: str | None = None,
+    typ: LoaderType = 'rt',
+) -> tuple[str, YamlObject] | None:
 
     if os.path.exists(path) is False:
         return None
 
+    if cache_dir:
+        return open_cached_template(path, cache_dir, typ=typ)
+
     try:
         with open(path, 'r') as yml:
-            loader = YAML(typ='rt')
-            loader.preserve_quotes = True
-            loader.indent(mapping=2, sequence=4, offset=2)
-            return (path, loader.load(yml))
+            return (path, load_template(yml.read(), typ=typ))
     except Exception as e:
         raise e
+
+def open_cached_template(
+    path: str,
+    cache_dir: str,
+    typ: LoaderType = 'rt',
+) -> tuple[str, YamlObject]:
+    with open(path, 'rb') as yml:
+        content = yml.read()
+
+    key = get_cache_key(content, typ)
+    if (
+        template := load_cached_template(cache_dir, key)
+    ) is not None:
+        return (path, template)
+
+    template = load_template(content.decode(), typ=typ)
+
+    store_cached_template(cache_dir, key, template)
+
+    return (path, template)
+
+def hash_template(path: str) -> str:
+    with open(path, 'rb') as yml:
+        return get_template_hash(yml.read())
+
+async def hash_templates(paths: list[str]) -> list[str]:
+    loop = asyncio.get_event_loop()
+
+    return await asyncio.gather(*[
+        loop.run_in_executor(
+            None,
+            hash_template,
+            path,
+        ) for path in paths
+    ])
     
 def is_file(path: str) -> bool:
     return os.path.isdir(path) is False
@@ -69,12 +225,15 @@ async def localize_path(path: str, loop: asyncio.AbstractEventLoop):
         localized,
     )
 
-async def load_templates_from_path(
+async def find_template_paths_from_path(
     path: str,
     loop: asyncio.AbstractEventLoop,
     file_pattern: str | None = None,
-    exclude: list[str] | None = None,
+    exclude: ExcludeTrie | list[str] | None = None,
 ):
+    if isinstance(exclude, list):
+        exclude = ExcludeTrie(exclude)
+
     if path == '.':
         path = await convert_to_cwd(loop)
 
@@ -95,20 +254,13 @@ async def load_templates_from_path(
         is_file,
         path,
     ) is False:
-        template_filepaths = await loop.run_in_executor(
+        # Excludes are applied during the walk
+        return await loop.run_in_executor(
             None,
-            find_templates,
+            walk_templates,
             path,
-            '**/*.yml',
-        )
-
-        template_filepaths.extend(
-            await loop.run_in_executor(
-                None,
-                find_templates,
-                path,
-                '**/*.yaml',
-            )
+            TEMPLATE_SUFFIXES,
+            exclude,
         )
 
     elif path.startswith('*'):
@@ -130,52 +282,128 @@ async def load_templates_from_path(
         assert await path_exists(path, loop), f'❌ Path {path} does not exist'
 
     if exclude:
-        absolute_exclude_paths = await asyncio.gather(*[
-            convert_to_absolute(exclude_path, loop) for exclude_path in exclude
-        ])
-
-        absolute_template_paths = await asyncio.gather(*[
-            convert_to_absolute(template_filepath, loop)
-            for template_filepath in template_filepaths
-        ])
-
         template_filepaths = [
-            template_filepath for template_filepath in absolute_template_paths
-            if str(template_filepath) not in absolute_exclude_paths
-            and len([
-                exclude_path
-                for exclude_path in absolute_exclude_paths
-                if str(template_filepath).startswith(exclude_path)
-            ]) == 0
+            os.path.abspath(template_filepath)
+            for template_filepath in template_filepaths
+            if not exclude.excludes(str(template_filepath))
         ]
 
+    return [
+        str(template_filepath)
+        for template_filepath in template_filepaths
+    ]
+
+async def find_template_paths(
+    paths: str | list[str],
+    file_pattern: str | None = None,
+    exclude: list[str] | None = None,
+):
+    if isinstance(paths, str):
+        paths = [paths]
+
+    # Compiled once and shared across every path
+    excludes = ExcludeTrie(exclude) if exclude else None
+
+    loop = asyncio.get_event_loop()
+
+    found = await asyncio.gather(*[
+        find_template_paths_from_path(
+            path,
+            loop,
+            file_pattern=file_pattern,
+            exclude=excludes,
+        ) for path in paths
+    ])
+
+    template_filepaths: list[str] = []
+
+    for result in found:
+        template_filepaths.extend(result)
+
+    return template_filepaths
+
+def open_sniffed_template(
+    path: str,
+    cache_dir: str | None = None,
+    typ: LoaderType = 'rt',
+) -> tuple[str, YamlObject] | None:
+    if sniff_template(path) is False:
+        return None
+
+    return open_template(
+        path,
+        cache_dir=cache_dir,
+        typ=typ,
+    )
+
+def is_template(template: tuple[str, Data] | None):
+    return (
+        template is not None
+        and template[1] is not None
+        and template[1].get(
+            'AWSTemplateFormatVersion',
+        ) is not None
+    )
+
+def load_document(
+    path: str,
+    cache_dir: str | None = None,
+    typ: LoaderType = 'rt',
+) -> YamlObject | None:
+    if is_template(
+        template := open_sniffed_template(
+            path,
+            cache_dir=cache_dir,
+            typ=typ,
+        )
+    ):
+        return template[1]
+
+async def load_templates_from_path(
+    path: str,
+    loop: asyncio.AbstractEventLoop,
+    file_pattern: str | None = None,
+    exclude: ExcludeTrie | list[str] | None = None,
+    cache_dir: str | None = None,
+    typ: LoaderType = 'rt',
+):
+    template_filepaths = await find_template_paths_from_path(
+        path,
+        loop,
+        file_pattern=file_pattern,
+        exclude=exclude,
+    )
+
     templates: list[tuple[str, Data]]  = await asyncio.gather(*[
         loop.run_in_executor(
             None,
-            open_template,
+            open_sniffed_template,
             template_path,
+            cache_dir,
+            typ,
         ) for template_path in template_filepaths
     ])
 
     return [
         template 
         for template in templates 
-        if template is not None
-        and template[1] is not None
-        and template[1].get(
-            'AWSTemplateFormatVersion',
-        ) is not None
+        if is_template(template)
     ]
 
 async def load_templates(
     paths: str | list[str],
     file_pattern: str | None = None,
     exclude: list[str] | None = None,
+    cache_dir: str | None = None,
+    typ: LoaderType = 'rt',
 ):
     
     if isinstance(paths, str):
         paths = [paths]
 
+    # Compiled once and shared across every path
+    excludes = ExcludeTrie(exclude) if exclude else None
+
     loop = asyncio.get_event_loop()
     
     found = await asyncio.gather(*[
@@ -183,7 +411,9 @@ async def load_templates(
             path,
             loop,
             file_pattern=file_pattern,
-            exclude=exclude,
+            exclude=excludes,
+            cache_dir=cache_dir,
+            typ=typ,
         ) for path in paths
     ])
 
@@ -0,0 +1,210 @@
+import asyncio
+import functools
+from typing import AsyncIterator
+
+from cfn_check.collection.collection import Collection
+from cfn_check.collection.document_store import DocumentStore
+from cfn_check.evaluation.result import ValidationResult
+from cfn_check.evaluation.result_cache import ResultCache
+from cfn_check.evaluation.validate import ValidationSet
+from cfn_check.shared.types import YamlObject
+from .files import hash_templates, load_document
+
+
+PIPELINE_QUEUE_SIZE = 4
+
+LoadedTemplate = tuple[str, YamlObject]
+
+
+class ValidationPipeline:
+    '''
+    Validates templates as they're loaded rather than loading them
+    all first. Templates are parsed in the default executor, up to
+    queue_size ahead of the one being validated.
+
+    Collections share a document store, so cross-document queries
+    still see every template, loading them as they're read. Templates
+    no query has read are released (along with their renders) once
+    validated. If max_documents is set, the least recently read are
+    evicted past that, and loaded again if they're read again.
+    '''
+
+    def __init__(
+        self,
+        validation_set: ValidationSet,
+        rules: dict[str, Collection],
+        cache_dir: str | None = None,
+        result_cache: ResultCache | None = None,
+        queue_size: int = PIPELINE_QUEUE_SIZE,
+        max_documents: int | None = None,
+    ):
+        self.validation_set = validation_set
+        self.rules = rules
+        self.cache_dir = cache_dir
+        self.result_cache = result_cache
+        self.queue_size = queue_size
+
+        self.documents = DocumentStore(
+            loader=functools.partial(
+                load_document,
+                cache_dir=cache_dir,
+                typ='fast',
+            ),
+            max_documents=max_documents,
+            on_evict=validation_set.discard,
+        )
+
+        for rule in rules.values():
+            rule.use_documents(self.documents)
+
+        self.templates_evaluated = 0
+        self._template_keys: dict[str, str] = {}
+
+    async def validate(
+        self,
+        paths: list[str],
+        max_errors: int | None = None,
+    ) -> AsyncIterator[ValidationResult]:
+        loop = asyncio.get_running_loop()
+
+        self.documents.add(paths)
+
+        if self.result_cache:
+            # Every path is keyed as any of them may be queried,
+            # though not every path may turn out to be a template.
+            self._template_keys = dict(zip(
+                paths,
+                await hash_templates(paths),
+            ))
+
+            self.result_cache.set_documents(
+                list(self._template_keys.items()),
+            )
+
+        # Holds loads in path order, so results stream in the same
+        # order as a non-pipelined run. Blocking on a full queue
+        # bounds how many parsed templates are held at once.
+        loading: asyncio.Queue[asyncio.Future | None] = asyncio.Queue(
+            maxsize=self.queue_size,
+        )
+
+        loader = asyncio.create_task(
+            self._load(paths, loading),
+        )
+
+        error_count = 0
+
+        try:
+            while (loaded := await loading.get()) is not None:
+                if (template := await loaded) is None:
+                    continue
+
+                (path, data) = template
+
+                for validator, err in await loop.run_in_executor(
+                    None,
+                    functools.partial(
+                        self._evaluate,
+                        path,
+                        data,
+                        max_errors=(
+                            None if max_errors is None else max_errors - error_count
+                        ),
+                    ),
+                ):
+                    error_count += 1
+                    yield ValidationResult.from_error(
+                        validator,
+                        err,
+                        template=path,
+                    )
+
+                self.templates_evaluated += 1
+
+                if max_errors is not None and error_count >= max_errors:
+                    break
+
+        finally:
+            loader.cancel()
+
+            await asyncio.gather(
+                loader,
+                return_exceptions=True,
+            )
+
+            # Loads already started still finish in the executor,
+            # so we wait them out rather than leave them running.
+            while not loading.empty():
+                if (loaded := loading.get_nowait()) is not None:
+                    await asyncio.gather(
+                        loaded,
+                        return_exceptions=True,
+                    )
+
+            self.validation_set.clear()
+            self.documents.clear()
+
+    async def _load(
+        self,
+        paths: list[str],
+        loading: asyncio.Queue[asyncio.Future | None],
+    ):
+        loop = asyncio.get_running_loop()
+
+        for path in paths:
+            load = loop.run_in_executor(
+                None,
+                self._load_template,
+                path,
+            )
+
+            try:
+                await loading.put(load)
+
+            except asyncio.CancelledError:
+                # Cancelled while waiting for room in the queue, so
+                # the load never reached it and is waited out here.
+                await asyncio.gather(
+                    load,
+                    return_exceptions=True,
+                )
+
+                raise
+
+        await loading.put(None)
+
+    def _load_template(
+        self,
+        path: str,
+    ) -> LoadedTemplate | None:
+        # Loaded off the validating thread, so the template is
+        # only added to the store once it's validated.
+        if (
+            data := load_document(
+                path,
+                cache_dir=self.cache_dir,
+                typ='fast',
+            )
+        ) is not None:
+            return (path, data)
+
+    def _evaluate(
+        self,
+        path: str,
+        data: YamlObject,
+        max_errors: int | None = None,
+    ):
+        # A template already loaded by a query is validated as
+        # loaded, sharing its renders, and either way is held so
+        # queries can't evict it while it's validated.
+        data = self.documents.hold(path, data)
+
+        try:
+            return self.validation_set.evaluate(
+                data,
+                key=self._template_keys.get(path),
+                max_errors=max_errors,
+            )
+
+        finally:
+            self.documents.release(path)
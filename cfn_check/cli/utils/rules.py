@@ -0,0 +1,103 @@
+import importlib.util
+import inspect
+import ntpath
+import pathlib
+import sys
+
+from cfn_check.collection.collection import Collection
+from cfn_check.evaluation.result_cache import ResultCache
+from cfn_check.evaluation.validate import ValidationSet
+from cfn_check.rendering import RenderCache
+from cfn_check.validation.validator import Validator
+from .attributes import bind
+
+
+def import_rules(path: str) -> dict[str, type[Collection]]:
+    '''
+    Import a rules file and return the Collections it defines or
+    imports, resolving the module the same way the CLI's ImportType
+    does so worker processes see the same rules as the parent.
+    Collections from other rules files imported in the same process
+    (i.e. by a server) are left out.
+    '''
+    resolved_path = pathlib.Path(path).resolve()
+
+    package_dir = resolved_path.parent
+    package_dir_module = str(package_dir).split('/')[-1]
+    package_slug = ntpath.basename(path).split('.')[0]
+
+    spec = importlib.util.spec_from_file_location(
+        f'{package_dir_module}.{package_slug}',
+        path,
+    )
+
+    if str(package_dir.parent) not in sys.path:
+        sys.path.append(str(package_dir.parent))
+
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module.__name__] = module
+    spec.loader.exec_module(module)
+
+    return {
+        collection.__name__: collection
+        for collection in Collection.__subclasses__()
+        if collection.__module__ == module.__name__
+        or getattr(module, collection.__name__, None) is collection
+    }
+
+
+def reload_rules(path: str) -> dict[str, type[Collection]]:
+    '''
+    Re-import a rules file, skipping Collections left over from
+    previous imports (those no longer reachable from the module
+    that defined them).
+    '''
+    return {
+        name: collection
+        for name, collection in import_rules(path).items()
+        if getattr(
+            sys.modules.get(collection.__module__),
+            collection.__name__,
+            None,
+        ) is collection
+    }
+
+
+def create_validation_set(
+    rules: dict[str, Collection],
+    flags: list[str] | None = None,
+    render_cache: RenderCache | None = None,
+    result_cache: ResultCache | None = None,
+):
+    validation_set = ValidationSet(
+        [
+            bind(
+                rule,
+                validation,
+            )
+            for rule in rules.values()
+            for _, validation in inspect.getmembers(rule)
+            if isinstance(validation, Validator)
+        ],
+        flags=flags,
+        render_cache=render_cache,
+        result_cache=result_cache,
+    )
+
+    # Queries made by rules then read the documents rendered
+    # for the run rather than rendering their own copies.
+    for rule in rules.values():
+        rule.use_evaluator(validation_set.evaluator)
+
+    return validation_set
+
+
+def count_validators(
+    collections: dict[str, type[Collection]],
+):
+    return len([
+        validation
+        for collection in collections.values()
+        for _, validation in inspect.getmembers(collection)
+        if isinstance(validation, Validator)
+    ])
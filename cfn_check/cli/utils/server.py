@@ -0,0 +1,499 @@
+import asyncio
+import copy
+import json
+import os
+import pathlib
+import tempfile
+import time
+from typing import Any
+from async_logging import Logger
+
+from cfn_check.collection.collection import Collection
+from cfn_check.evaluation.errors import (
+    assemble_error_messages,
+    format_validation_error,
+)
+from cfn_check.evaluation.validate import ValidationSet
+from cfn_check.logging.models import DebugLog, InfoLog
+from cfn_check.rendering import RenderCache, Renderer, RenderMode
+from cfn_check.shared.types import YamlObject
+from .files import (
+    LoaderType,
+    find_template_paths,
+    is_template,
+    open_sniffed_template,
+    write_to_file,
+)
+from .rules import create_validation_set, reload_rules
+from .stdout import dump_to_string
+from .watch import FileStat, stat_paths
+
+
+DEFAULT_SOCKET_PATH = os.path.join(
+    tempfile.gettempdir(),
+    f'cfn-check-{os.getuid()}.sock',
+)
+
+TemplateKey = tuple[str, LoaderType, RenderMode | None]
+RulesKey = tuple[str, tuple[str, ...]]
+
+
+def get_render_mode(flags: list[str]) -> RenderMode | None:
+    '''
+    The mode validating with the flags renders templates in place
+    with, or None if they're validated unrendered.
+    '''
+    if 'no-render' in flags:
+        return None
+
+    return 'graph' if 'graph-render' in flags else 'tree'
+
+
+async def send_request(
+    socket_path: str,
+    command: str,
+    **args: Any,
+) -> dict[str, Any]:
+    '''
+    Send a request to a running `cfn-check serve`, resolving
+    paths in the request against the current directory.
+    '''
+    try:
+        reader, writer = await asyncio.open_unix_connection(socket_path)
+
+    except (FileNotFoundError, ConnectionRefusedError):
+        raise AssertionError(f'❌ No cfn-check server listening on {socket_path}')
+
+    try:
+        writer.write(json.dumps({
+            'command': command,
+            'cwd': os.getcwd(),
+            'args': args,
+        }).encode())
+
+        writer.write_eof()
+        await writer.drain()
+
+        response: dict[str, Any] = json.loads(await reader.read())
+
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+    assert (error := response.get('error')) is None, error
+
+    return response
+
+
+class ServedRules:
+
+    def __init__(
+        self,
+        rules_path: str,
+        flags: list[str],
+        render_cache: RenderCache,
+    ):
+        self.rules_path = rules_path
+        self.flags = flags
+        self.render_cache = render_cache
+
+        self.stat: FileStat | None = None
+        self.rules: dict[str, Collection] = {}
+        self.validation_set: ValidationSet | None = None
+
+    def refresh(self):
+        stat = stat_paths([self.rules_path]).get(self.rules_path)
+        assert stat is not None, f'❌ Rules file {self.rules_path} does not exist'
+
+        if stat == self.stat:
+            return
+
+        self.rules = {
+            name: collection()
+            for name, collection in reload_rules(self.rules_path).items()
+        }
+
+        self.validation_set = create_validation_set(
+            self.rules,
+            flags=self.flags,
+            render_cache=self.render_cache,
+        )
+
+        self.stat = stat
+
+
+class ValidationServer:
+    '''
+    Serves validate and render requests over a Unix domain socket,
+    keeping imported rules, compiled queries, parsed templates and
+    renders warm between requests. Templates and rules files are
+    re-loaded only when their mtime or size changes.
+
+    Each connection carries one JSON request, read until EOF, and
+    one JSON response.
+    '''
+
+    def __init__(
+        self,
+        socket_path: str = DEFAULT_SOCKET_PATH,
+        cache_dir: str | None = None,
+    ):
+        self.socket_path = socket_path
+        self.cache_dir = cache_dir
+
+        self._render_caches: dict[RenderMode, RenderCache] = {
+            'tree': RenderCache(mode='tree'),
+            'graph': RenderCache(mode='graph'),
+        }
+
+        self._rules: dict[RulesKey, ServedRules] = {}
+        self._templates: dict[
+            TemplateKey,
+            tuple[FileStat | None, tuple[str, YamlObject] | None],
+        ] = {}
+
+        self._lock = asyncio.Lock()
+        self._logger: Logger | None = None
+
+    async def serve(
+        self,
+        logger: Logger,
+    ):
+        self._logger = logger
+
+        if os.path.exists(self.socket_path):
+            try:
+                _, writer = await asyncio.open_unix_connection(self.socket_path)
+                writer.write_eof()
+                writer.close()
+                await writer.wait_closed()
+
+                raise AssertionError(f'❌ A cfn-check server is already listening on {self.socket_path}')
+
+            except ConnectionRefusedError:
+                # Left behind by a server that didn't shut down cleanly
+                os.remove(self.socket_path)
+
+        server = await asyncio.start_unix_server(
+            self._handle_connection,
+            path=self.socket_path,
+        )
+
+        try:
+            async with server:
+                await logger.log(InfoLog(message=f'✅ Serving on {self.socket_path}'))
+                await server.serve_forever()
+
+        finally:
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+    async def handle(
+        self,
+        request: dict[str, Any],
+    ) -> dict[str, Any]:
+        command = request.get('command')
+        args: dict[str, Any] = request.get('args', {})
+
+        start = time.monotonic()
+
+        # Requests are handled one at a time, which lets paths be
+        # resolved relative to the client's working directory.
+        async with self._lock:
+            cwd = os.getcwd()
+
+            try:
+                os.chdir(request.get('cwd', cwd))
+
+                match command:
+                    case 'validate':
+                        response = await self.validate(**args)
+
+                    case 'render':
+                        response = await self.render(**args)
+
+                    case _:
+                        response = {
+                            'error': f'❌ Unknown command {command}',
+                        }
+
+            except AssertionError as err:
+                response = {
+                    'error': str(err),
+                }
+
+            except Exception as err:
+                response = {
+                    'error': f'❌ {type(err).__name__}: {err}',
+                }
+
+            finally:
+                os.chdir(cwd)
+
+        if self._logger:
+            await self._logger.log(DebugLog(message=f'{command} request served in {(time.monotonic() - start) * 1000:.1f}ms'))
+
+        return response
+
+    async def validate(
+        self,
+        paths: list[str],
+        rules_path: str,
+        file_pattern: str | None = None,
+        exclude_paths: list[str] | None = None,
+        flags: list[str] | None = None,
+        max_errors: int | None = None,
+    ):
+        if flags is None:
+            flags = []
+
+        template_paths = await find_template_paths(
+            paths,
+            file_pattern=file_pattern,
+            exclude=exclude_paths,
+        )
+
+        # Each render mode renders the templates it's given in
+        # place, so every mode validates its own parsed trees.
+        templates = await self._load_templates(
+            template_paths,
+            'fast',
+            render_mode=get_render_mode(flags),
+        )
+
+        assert len(templates) > 0 , '❌ No matching files found'
+
+        served = self._get_rules(rules_path, flags)
+        served.refresh()
+
+        for rule in served.rules.values():
+            for path, data in templates:
+                rule.documents[path] = data
+
+        messages: list[str] = []
+
+        try:
+            for _, data in templates:
+                messages.extend([
+                    format_validation_error(
+                        validator.name,
+                        validator.query,
+                        err,
+                    )
+                    for validator, err in served.validation_set.evaluate(
+                        data,
+                        max_errors=(
+                            None if max_errors is None else max_errors - len(messages)
+                        ),
+                    )
+                ])
+
+                if max_errors is not None and len(messages) >= max_errors:
+                    break
+
+        finally:
+            for rule in served.rules.values():
+                rule.documents.clear()
+
+        validation_error = assemble_error_messages(messages)
+
+        return {
+            'templates_evaluated': len(templates),
+            'validation_count': served.validation_set.count,
+            'errors': str(validation_error) if validation_error else None,
+        }
+
+    async def render(
+        self,
+        paths: list[str],
+        exclude_paths: list[str] | None = None,
+        output_path: str | None = None,
+        attributes: dict[str, str] | None = None,
+        availability_zones: list[str] | None = None,
+        mappings: dict[str, str] | None = None,
+        parameters: dict[str, str] | None = None,
+        references: dict[str, str] | None = None,
+        render_mode: RenderMode = 'tree',
+    ):
+        template_paths = await find_template_paths(
+            paths,
+            exclude=exclude_paths,
+        )
+
+        templates = await self._load_templates(template_paths, 'rt')
+
+        assert len(templates) > 0 , '❌ No files to render'
+
+        results: list[tuple[str, str, Any]] = []
+
+        for filepath, template in templates:
+            # Rendering rewrites the template in place, so we render
+            # a copy to keep the cached template for later requests.
+            rendered = Renderer(mode=render_mode).render(
+                copy.deepcopy(template),
+                attributes=attributes,
+                availability_zones=availability_zones,
+                mappings=mappings,
+                parameters=parameters,
+                references=references,
+            )
+
+            template_path = pathlib.Path(filepath)
+
+            results.append((
+                template_path.stem,
+                template_path.suffix,
+                rendered,
+            ))
+
+        if output_path:
+            for filename, suffix, rendered in results:
+                await write_to_file(
+                    output_path,
+                    rendered,
+                    filename=f'{filename}-rendered{suffix}',
+                )
+
+            return {
+                'rendered': [
+                    f'{filename}{suffix}' for filename, suffix, _ in results
+                ],
+            }
+
+        return {
+            'output': dump_to_string([
+                rendered for _, _, rendered in results
+            ]),
+        }
+
+    async def _handle_connection(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ):
+        try:
+            # Empty connections are liveness checks from `serve`
+            if body := await reader.read():
+                try:
+                    response = await self.handle(json.loads(body))
+
+                except json.JSONDecodeError as err:
+                    response = {
+                        'error': f'❌ Invalid request - {err}',
+                    }
+
+                writer.write(json.dumps(response).encode())
+                await writer.drain()
+
+            writer.close()
+            await writer.wait_closed()
+
+        except ConnectionError:
+            # The client went away before reading its response
+            writer.close()
+
+    def _get_rules(
+        self,
+        rules_path: str,
+        flags: list[str],
+    ):
+        key: RulesKey = (
+            os.path.abspath(rules_path),
+            tuple(sorted(flags)),
+        )
+
+        if (served := self._rules.get(key)) is None:
+            served = ServedRules(
+                key[0],
+                flags,
+                self._render_caches[
+                    get_render_mode(flags) or 'tree'
+                ],
+            )
+
+            self._rules[key] = served
+
+        return served
+
+    async def _load_templates(
+        self,
+        paths: list[str],
+        typ: LoaderType,
+        render_mode: RenderMode | None = None,
+    ):
+        loop = asyncio.get_event_loop()
+
+        # Templates deleted since they were cached are dropped
+        # along with their renders, whichever request loaded them.
+        existing = await loop.run_in_executor(
+            None,
+            stat_paths,
+            list({
+                template_path for template_path, _, _ in self._templates
+            }),
+        )
+
+        for key in [
+            key for key in self._templates
+            if key[0] not in existing
+        ]:
+            self._discard(key)
+
+        stats = await loop.run_in_executor(
+            None,
+            stat_paths,
+            paths,
+        )
+
+        stale = [
+            path for path in paths
+            if (
+                cached := self._templates.get((os.path.abspath(path), typ, render_mode))
+            ) is None or cached[0] != stats.get(path)
+        ]
+
+        loaded = await asyncio.gather(*[
+            loop.run_in_executor(
+                None,
+                open_sniffed_template,
+                path,
+                self.cache_dir,
+                typ,
+            ) for path in stale
+        ])
+
+        for path, template in zip(stale, loaded):
+            key: TemplateKey = (os.path.abspath(path), typ, render_mode)
+            self._discard(key)
+
+            self._templates[key] = (
+                stats.get(path),
+                template,
+            )
+
+        return [
+            (path, template[1])
+            for path in paths
+            if is_template(
+                template := self._templates[(os.path.abspath(path), typ, render_mode)][1]
+            )
+        ]
+
+    def _discard(
+        self,
+        key: TemplateKey,
+    ):
+        cached = self._templates.pop(key, None)
+        if cached is None or cached[1] is None:
+            return
+
+        _, data = cached[1]
+
+        # Validation sets first, so their resource indexes for
+        # the rendered trees are dropped along with the renders.
+        for served in self._rules.values():
+            if served.validation_set is not None:
+                served.validation_set.discard(data)
+
+        for render_cache in self._render_caches.values():
+            render_cache.discard(data)
@@ -1,5 +1,7 @@
 import asyncio
+import io
 import sys
+from cfn_check.evaluation.result import ValidationResult
 from cfn_check.yaml import YAML
 from cfn_check.yaml.comments import CommentedBase
 
@@ -29,4 +31,24 @@ async def write_multiple_files_to_stdout(data: CommentedBase):
         yaml.dump_all,
         data,
         sys.stdout,
-    )
\ No newline at end of file
+    )
+
+def dump_to_string(data: list[CommentedBase]) -> str:
+    yaml = YAML(typ=['rt'])
+    yaml.preserve_quotes = True
+    yaml.width = 4096
+    yaml.indent(mapping=2, sequence=4, offset=2)
+
+    output = io.StringIO()
+    if len(data) > 1:
+        yaml.dump_all(data, output)
+
+    else:
+        yaml.dump(data[0], output)
+
+    return output.getvalue()
+
+def write_result_to_stdout(result: ValidationResult):
+    # Flushed per line so consumers see results as they're found
+    sys.stdout.write(f'{result.model_dump_json()}\n')
+    sys.stdout.flush()
@@ -0,0 +1,317 @@
+import asyncio
+import os
+from async_logging import Logger
+
+from cfn_check.collection.collection import Collection
+from cfn_check.evaluation.errors import (
+    assemble_error_messages,
+    format_validation_error,
+)
+from cfn_check.evaluation.validate import ValidationSet
+from cfn_check.logging.models import ErrorLog, InfoLog
+from cfn_check.rendering import RenderCache
+from cfn_check.shared.types import YamlObject
+from .files import (
+    find_template_paths,
+    is_template,
+    open_sniffed_template,
+)
+from .rules import create_validation_set, reload_rules
+
+
+FileStat = tuple[int, int]
+LoadResult = tuple[str, tuple[str, YamlObject] | None, Exception | None]
+
+
+def stat_paths(paths: list[str]) -> dict[str, FileStat]:
+    stats: dict[str, FileStat] = {}
+
+    for path in paths:
+        try:
+            stat = os.stat(path)
+
+        except FileNotFoundError:
+            continue
+
+        stats[path] = (
+            stat.st_mtime_ns,
+            stat.st_size,
+        )
+
+    return stats
+
+
+class WatchSession:
+    '''
+    Keeps rules, parsed templates, render results and per-template
+    validation messages in memory between polls. Each poll compares
+    file mtimes and sizes against the last poll, so only changed
+    templates are re-parsed, re-rendered and re-validated. Every
+    template is re-validated when the rules file changes.
+    '''
+
+    def __init__(
+        self,
+        paths: list[str],
+        rules_path: str,
+        collections: dict[str, type[Collection]],
+        file_pattern: str | None = None,
+        exclude: list[str] | None = None,
+        flags: list[str] | None = None,
+        cache_dir: str | None = None,
+    ):
+        if flags is None:
+            flags = []
+
+        self.paths = paths
+        self.rules_path = rules_path
+        self.file_pattern = file_pattern
+        self.exclude = exclude
+        self.flags = flags
+        self.cache_dir = cache_dir
+
+        # Shared across rule reloads so unchanged templates
+        # aren't re-rendered when only the rules change.
+        self.render_cache = RenderCache(
+            mode='graph' if 'graph-render' in flags else 'tree',
+        )
+
+        self._rules: dict[str, Collection] = {}
+        self._validation_set: ValidationSet | None = None
+        self._rules_stat: FileStat | None = None
+        self._rules_error: str | None = None
+
+        self._template_paths: list[str] = []
+        self._template_stats: dict[str, FileStat] = {}
+        self._templates: dict[str, YamlObject] = {}
+        self._messages: dict[str, list[str]] = {}
+        self._discovery_error: str | None = None
+
+        self._load_rules(collections)
+
+    @property
+    def validation_count(self):
+        return self._validation_set.count
+
+    @property
+    def templates_evaluated(self):
+        return len(self._templates)
+
+    async def run(
+        self,
+        logger: Logger,
+        interval: float = 1.0,
+    ):
+        while True:
+            if await self.poll():
+                await self.log(logger)
+
+            await asyncio.sleep(interval)
+
+    async def poll(self) -> bool:
+        '''
+        Re-validate whatever changed since the last poll, returning
+        whether anything did.
+        '''
+        loop = asyncio.get_event_loop()
+
+        rules_stats = await loop.run_in_executor(
+            None,
+            stat_paths,
+            [self.rules_path],
+        )
+
+        rules_changed = False
+        if (
+            rules_stat := rules_stats.get(self.rules_path)
+        ) != self._rules_stat:
+            rules_changed = self._rules_stat is not None
+            self._rules_stat = rules_stat
+
+        rules_reloaded = False
+        if rules_changed:
+            try:
+                collections = await loop.run_in_executor(
+                    None,
+                    reload_rules,
+                    self.rules_path,
+                )
+
+                self._load_rules(collections)
+                self._rules_error = None
+                rules_reloaded = True
+
+            except Exception as err:
+                # Keep validating with the previous rules until
+                # the rules file imports cleanly again.
+                self._rules_error = f'Rules: {self.rules_path} failed to load\n{err}\n'
+
+        try:
+            template_paths = await find_template_paths(
+                self.paths,
+                file_pattern=self.file_pattern,
+                exclude=self.exclude,
+            )
+
+            self._discovery_error = None
+
+        except AssertionError as err:
+            template_paths = []
+            self._discovery_error = str(err)
+
+        stats = await loop.run_in_executor(
+            None,
+            stat_paths,
+            template_paths,
+        )
+
+        removed = [
+            path for path in self._template_stats if path not in stats
+        ]
+
+        changed = [
+            path for path, stat in stats.items()
+            if self._template_stats.get(path) != stat
+        ]
+
+        self._template_paths = template_paths
+        self._template_stats = stats
+
+        for path in removed:
+            self._forget(path)
+
+        loaded: list[LoadResult] = await asyncio.gather(*[
+            loop.run_in_executor(
+                None,
+                self._load_template,
+                path,
+            ) for path in changed
+        ])
+
+        validate_paths: list[str] = []
+        for path, template, err in loaded:
+            self._forget(path)
+
+            if err is not None:
+                self._messages[path] = [
+                    f'Template: {path} failed to load\n{err}\n',
+                ]
+
+            elif is_template(template):
+                self._templates[path] = template[1]
+                validate_paths.append(path)
+
+                for rule in self._rules.values():
+                    rule.documents[path] = template[1]
+
+        if rules_reloaded:
+            validate_paths = list(self._templates)
+
+        for path in validate_paths:
+            self._validate_template(path)
+
+        return rules_changed or len(removed) > 0 or len(changed) > 0
+
+    def report(self) -> Exception | None:
+        messages = [
+            message
+            for message in (self._rules_error, self._discovery_error)
+            if message
+        ]
+
+        messages.extend([
+            message
+            for path in self._template_paths
+            for message in self._messages.get(path, [])
+        ])
+
+        return assemble_error_messages(messages)
+
+    async def log(
+        self,
+        logger: Logger,
+    ):
+        if validation_error := self.report():
+            await logger.log(ErrorLog(
+                message=f'❌ Validation failed{validation_error}',
+                error=str(validation_error),
+            ))
+
+        elif self.templates_evaluated < 1:
+            await logger.log(InfoLog(message='❌ No matching files found'))
+
+        else:
+            await logger.log(InfoLog(message=f'✅ {self.validation_count} validations met for {self.templates_evaluated} templates'))
+
+    def _load_rules(
+        self,
+        collections: dict[str, type[Collection]],
+    ):
+        self._rules = {
+            name: collection()
+            for name, collection in collections.items()
+        }
+
+        for rule in self._rules.values():
+            rule.documents.update(self._templates)
+
+        self._validation_set = create_validation_set(
+            self._rules,
+            flags=self.flags,
+            render_cache=self.render_cache,
+        )
+
+    def _load_template(
+        self,
+        path: str,
+    ) -> LoadResult:
+        try:
+            return (
+                path,
+                open_sniffed_template(
+                    path,
+                    cache_dir=self.cache_dir,
+                    typ='fast',
+                ),
+                None,
+            )
+
+        except Exception as err:
+            # Templates are often mid-edit when saved, so parse
+            # errors are reported rather than ending the session.
+            return (path, None, err)
+
+    def _validate_template(
+        self,
+        path: str,
+    ):
+        try:
+            self._messages[path] = [
+                format_validation_error(
+                    validator.name,
+                    validator.query,
+                    err,
+                )
+                for validator, err in self._validation_set.evaluate(
+                    self._templates[path],
+                )
+            ]
+
+        except Exception as err:
+            self._messages[path] = [
+                f'Template: {path} failed to validate\n{err}\n',
+            ]
+
+    def _forget(
+        self,
+        path: str,
+    ):
+        self._messages.pop(path, None)
+
+        if (
+            template := self._templates.pop(path, None)
+        ) is not None:
+            self._validation_set.discard(template)
+
+            for rule in self._rules.values():
+                rule.documents.pop(path, None)
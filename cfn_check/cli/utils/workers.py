@@ -0,0 +1,295 @@
+import asyncio
+import functools
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.synchronize import Event
+from typing import Callable
+
+from cfn_check.collection.collection import Collection
+from cfn_check.collection.document_store import DocumentStore
+from cfn_check.evaluation.errors import (
+    assemble_error_messages,
+    format_validation_result,
+)
+from cfn_check.evaluation.result import ValidationResult
+from cfn_check.evaluation.result_cache import ResultCache
+from cfn_check.evaluation.validate import ValidationSet
+from cfn_check.shared.types import YamlObject
+from .cache import create_result_cache
+from .files import (
+    hash_templates,
+    is_template,
+    load_document,
+    open_sniffed_template,
+)
+from .rules import create_validation_set, import_rules
+
+
+Shard = list[tuple[int, str]]
+ShardResult = list[tuple[int, list[ValidationResult]]]
+
+
+_rules: dict[str, Collection] = {}
+_validation_set: ValidationSet | None = None
+_documents: DocumentStore | None = None
+_template_keys: dict[str, str] = {}
+_cache_dir: str | None = None
+_result_cache: ResultCache | None = None
+_max_errors: int | None = None
+_stop: Event | None = None
+
+
+def initialize_worker(
+    rules_path: str,
+    paths: list[str],
+    flags: list[str] | None = None,
+    cache_dir: str | None = None,
+    template_keys: dict[str, str] | None = None,
+    max_errors: int | None = None,
+    stop: Event | None = None,
+):
+    global _validation_set, _documents, _template_keys, _cache_dir, _result_cache, _max_errors, _stop
+
+    _cache_dir = cache_dir
+    _template_keys = template_keys or {}
+    _max_errors = max_errors
+    _stop = stop
+
+    if cache_dir:
+        _result_cache = create_result_cache(
+            cache_dir,
+            flags=flags,
+        )
+
+        # Keyed by every template in the run, as rules reading
+        # other documents can read any of them.
+        _result_cache.set_documents(
+            list(_template_keys.items()),
+        )
+
+    collections = import_rules(rules_path)
+    for name, collection in collections.items():
+        _rules[name] = collection()
+
+    _validation_set = create_validation_set(
+        _rules,
+        flags=flags,
+        result_cache=_result_cache,
+    )
+
+    # As in a pipelined run, cross-document queries see every
+    # template, loading those outside the worker's shards as
+    # they're read, so results don't depend on the sharding.
+    _documents = DocumentStore(
+        loader=functools.partial(
+            load_document,
+            cache_dir=cache_dir,
+            typ='fast',
+        ),
+        on_evict=_validation_set.discard,
+    )
+    _documents.add(paths)
+
+    for rule in _rules.values():
+        rule.use_documents(_documents)
+
+
+def validate_shard(shard: Shard) -> tuple[ShardResult, int, int]:
+    templates: list[tuple[int, tuple[str, YamlObject]]] = []
+    for idx, path in shard:
+        # Set once enough errors have been found across all
+        # workers, so remaining shards return without loading.
+        if _stop is not None and _stop.is_set():
+            return ([], 0, 0)
+
+        if is_template(
+            template := open_sniffed_template(
+                path,
+                cache_dir=_cache_dir,
+                typ='fast',
+            )
+        ):
+            templates.append((idx, template))
+
+    cached, evaluated = 0, 0
+    if _result_cache:
+        cached, evaluated = _result_cache.cached, _result_cache.evaluated
+
+    results: ShardResult = []
+    error_count = 0
+
+    for idx, (path, data) in templates:
+        if _stop is not None and _stop.is_set():
+            break
+
+        # Held while validated, and released (along with its
+        # renders) afterwards unless a query has read it.
+        data = _documents.hold(path, data)
+
+        try:
+            template_results = [
+                ValidationResult.from_error(
+                    validator,
+                    err,
+                    template=path,
+                )
+                for validator, err in _validation_set.evaluate(
+                    data,
+                    key=_template_keys.get(path),
+                    max_errors=(
+                        None if _max_errors is None else _max_errors - error_count
+                    ),
+                )
+            ]
+
+        finally:
+            _documents.release(path)
+
+        results.append((
+            idx,
+            template_results,
+        ))
+
+        error_count += len(template_results)
+        if _max_errors is not None and error_count >= _max_errors:
+            # Other workers don't need to wait for this shard
+            # to be returned before stopping.
+            if _stop is not None:
+                _stop.set()
+
+            break
+
+    if _result_cache:
+        cached = _result_cache.cached - cached
+        evaluated = _result_cache.evaluated - evaluated
+
+    return (
+        results,
+        cached,
+        evaluated,
+    )
+
+
+def create_shards(
+    paths: list[str],
+    workers: int,
+) -> list[Shard]:
+    # Oversplitting relative to the worker count keeps workers
+    # busy when templates vary widely in size.
+    shard_size = max(
+        1,
+        math.ceil(len(paths) / (workers * 4)),
+    )
+
+    indexed = list(enumerate(paths))
+
+    return [
+        indexed[idx:idx + shard_size]
+        for idx in range(0, len(indexed), shard_size)
+    ]
+
+
+async def validate_with_workers(
+    paths: list[str],
+    rules_path: str,
+    workers: int,
+    flags: list[str] | None = None,
+    cache_dir: str | None = None,
+    max_errors: int | None = None,
+    on_result: Callable[[ValidationResult], None] | None = None,
+):
+    '''
+    Validate templates across worker processes. If on_result is
+    given, results are passed to it as each shard completes and
+    aren't collected, otherwise they're returned as one error in
+    template order.
+    '''
+    loop = asyncio.get_event_loop()
+
+    template_keys: dict[str, str] | None = None
+    if cache_dir:
+        template_keys = dict(zip(
+            paths,
+            await hash_templates(paths),
+        ))
+
+    context = multiprocessing.get_context('spawn')
+    stop = context.Event()
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=initialize_worker,
+        initargs=(
+            rules_path,
+            paths,
+            flags,
+            cache_dir,
+            template_keys,
+            max_errors,
+            stop,
+        ),
+    ) as pool:
+        pending = [
+            loop.run_in_executor(
+                pool,
+                validate_shard,
+                shard,
+            ) for shard in create_shards(paths, workers)
+        ]
+
+        templates_evaluated = 0
+        cached = 0
+        evaluated = 0
+        error_count = 0
+        collected: ShardResult = []
+
+        for completed in asyncio.as_completed(pending):
+            (
+                shard_result,
+                shard_cached,
+                shard_evaluated,
+            ) = await completed
+
+            templates_evaluated += len(shard_result)
+            cached += shard_cached
+            evaluated += shard_evaluated
+
+            for idx, template_results in shard_result:
+                if max_errors is not None:
+                    template_results = template_results[:max_errors - error_count]
+
+                error_count += len(template_results)
+
+                if on_result:
+                    for result in template_results:
+                        on_result(result)
+
+                else:
+                    collected.append((
+                        idx,
+                        template_results,
+                    ))
+
+            if max_errors is not None and error_count >= max_errors:
+                # Queued shards are cancelled and running shards
+                # stop before their next template.
+                stop.set()
+                for shard_future in pending:
+                    shard_future.cancel()
+
+                break
+
+    collected.sort(key=lambda result: result[0])
+
+    return (
+        templates_evaluated,
+        assemble_error_messages([
+            format_validation_result(result)
+            for _, template_results in collected
+            for result in template_results
+        ]),
+        cached,
+        evaluated,
+    )
@@ -1,20 +1,43 @@
-import inspect
-
+from typing import Literal
 from async_logging import LogLevelName, Logger, LoggingConfig
 from cocoa.cli import CLI, ImportType, YamlFile
 
-from cfn_check.cli.utils.attributes import bind
-from cfn_check.cli.utils.files import load_templates, write_to_file
-from cfn_check.evaluation.validate import ValidationSet
+from cfn_check.cli.utils.cache import create_result_cache
+from cfn_check.cli.utils.files import (
+    find_template_paths,
+    hash_templates,
+    load_templates,
+    write_to_file,
+)
+from cfn_check.cli.utils.rules import (
+    count_validators,
+    create_validation_set,
+)
+from cfn_check.cli.utils.pipeline import ValidationPipeline
+from cfn_check.cli.utils.server import send_request
+from cfn_check.cli.utils.stdout import write_result_to_stdout
+from cfn_check.cli.utils.watch import WatchSession
+from cfn_check.cli.utils.workers import validate_with_workers
 from cfn_check.logging.models import InfoLog
 from cfn_check.collection.collection import Collection
-from cfn_check.validation.validator import Validator
+from cfn_check.collection.document_store import DocumentStore
+from cfn_check.evaluation.errors import (
+    assemble_error_messages,
+    format_validation_result,
+)
+from cfn_check.evaluation.result import ValidationResult
+from cfn_check.evaluation.result_cache import ResultCache
 from .config import Config
 
 
 @CLI.command(
     shortnames={
-        'flags': 'F'
+        'flags': 'F',
+        'cache-dir': 'C',
+        'watch': 'W',
+        'fail-fast': 'x',
+        'pipeline': 'P',
+        'max-documents': 'D',
     },
 )
 async def validate(
@@ -24,6 +47,16 @@ async def validate(
     exclude_paths: list[str] | None = None,
     rules: ImportType[Collection] = None,
     flags: list[str] | None = None,
+    workers: int = 1,
+    cache_dir: str | None = None,
+    watch: bool = False,
+    poll_interval: float = 1.0,
+    server: str | None = None,
+    fail_fast: bool = False,
+    max_errors: int | None = None,
+    output_format: Literal['text', 'jsonl'] = 'text',
+    pipeline: bool = False,
+    max_documents: int | None = None,
     log_level: LogLevelName = 'info',
 ):
     '''
@@ -32,8 +65,18 @@ async def validate(
     @param config A CFN-Check yaml config file
     @param disabled A list of string features to disable during checks
     @param file_pattern A string pattern used to find template files
-    @param exclude_paths A list of string paths to ignore
+    @param exclude_paths A list of paths or globs (*, ?, [...] and **) to ignore
     @param rules Path to a file containing Collections
+    @param workers Number of worker processes to shard templates across
+    @param cache-dir Directory to cache parsed templates and rule results in between runs
+    @param watch Re-validate templates as they change
+    @param poll-interval Seconds between checks for changes in watch mode
+    @param server Path to the socket of a running cfn-check serve to validate with
+    @param fail-fast Stop validating at the first failure
+    @param max-errors Stop validating after this many failures
+    @param output-format Output failures as text once validation completes, or stream them to stdout as JSON Lines (jsonl)
+    @param pipeline Validate each template as it loads rather than loading every template first
+    @param max-documents Templates queries may hold in memory at once in pipelined mode, reloading evicted ones as they're queried again
     @param log_level The log level to use
     '''
 
@@ -57,36 +100,216 @@ async def validate(
 
     exclude_paths.append(config.value)
 
-    templates = await load_templates(
-        paths,
-        file_pattern=file_pattern,
-        exclude=exclude_paths,
-    )
+    if fail_fast:
+        max_errors = 1
+
+    assert max_errors is None or max_errors > 0, '❌ Max errors must be greater than zero'
+
+    if output_format == 'jsonl':
+        assert not server, '❌ JSON Lines output cannot be used with a server'
+        assert not watch, '❌ JSON Lines output cannot be used with watch mode'
 
-    for name, rule in rules.data.items():
-        rules.data[name] = rule()
+    if pipeline:
+        assert not server, '❌ Pipelined validation cannot be used with a server'
+        assert not watch, '❌ Pipelined validation cannot be used with watch mode'
+        assert workers < 2, '❌ Pipelined validation runs in-process and cannot be used with workers'
 
-        for file, data in templates:
-            rules.data[name].documents[file] = data
+    assert max_documents is None or pipeline, '❌ Max documents can only be used with pipelined validation'
+    assert max_documents is None or max_documents > 0, '❌ Max documents must be greater than zero'
 
-    validation_set = ValidationSet([ 
-        bind(
-            rule,
-            validation,
+    failures = 0
+
+    if server:
+        assert not watch, '❌ Watch mode cannot be used with a server'
+
+        response = await send_request(
+            server,
+            'validate',
+            paths=paths,
+            rules_path=rules.value,
+            file_pattern=file_pattern,
+            exclude_paths=exclude_paths,
+            flags=flags,
+            max_errors=max_errors,
         )
-        for rule in rules.data.values()
-        for _, validation in inspect.getmembers(rule)
-        if isinstance(validation, Validator)
-    ], flags=flags)
-    
-    if validation_error := validation_set.validate([
-        template_data for _, template_data in templates
-    ]):
-        raise validation_error
-    
-    templates_evaluated = len(templates)
+
+        if validation_error := response['errors']:
+            raise Exception(validation_error)
+
+        templates_evaluated = response['templates_evaluated']
+        validation_count = response['validation_count']
+
+    elif watch:
+        assert workers < 2, '❌ Watch mode validates in-process and cannot be used with workers'
+        assert max_errors is None, '❌ Fail fast and max errors cannot be used with watch mode'
+
+        session = WatchSession(
+            paths,
+            rules.value,
+            rules.data,
+            file_pattern=file_pattern,
+            exclude=exclude_paths,
+            flags=flags,
+            cache_dir=cache_dir,
+        )
+
+        await session.run(
+            logger,
+            interval=poll_interval,
+        )
+
+        return
+
+    elif workers > 1:
+        template_paths = await find_template_paths(
+            paths,
+            file_pattern=file_pattern,
+            exclude=exclude_paths,
+        )
+
+        assert len(template_paths) > 0 , '❌ No matching files found'
+
+        def stream_result(result: ValidationResult):
+            nonlocal failures
+
+            write_result_to_stdout(result)
+            failures += 1
+
+        (
+            templates_evaluated,
+            validation_error,
+            cached_results,
+            evaluated_results,
+        ) = await validate_with_workers(
+            template_paths,
+            rules.value,
+            workers,
+            flags=flags,
+            cache_dir=cache_dir,
+            max_errors=max_errors,
+            on_result=(
+                stream_result if output_format == 'jsonl' else None
+            ),
+        )
+
+        assert templates_evaluated > 0 , '❌ No matching files found'
+
+        if cache_dir:
+            await logger.log(InfoLog(message=f'{cached_results} rule results reused from cache, {evaluated_results} evaluated'))
+
+        if validation_error:
+            raise validation_error
+
+        validation_count = count_validators(rules.data)
+
+    else:
+        for name, rule in rules.data.items():
+            rules.data[name] = rule()
+
+        result_cache: ResultCache | None = None
+        if cache_dir:
+            result_cache = create_result_cache(
+                cache_dir,
+                flags=flags,
+            )
+
+        validation_set = create_validation_set(
+            rules.data,
+            flags=flags,
+            result_cache=result_cache,
+        )
+
+        if pipeline:
+            template_paths = await find_template_paths(
+                paths,
+                file_pattern=file_pattern,
+                exclude=exclude_paths,
+            )
+
+            assert len(template_paths) > 0 , '❌ No matching files found'
+
+            validation_pipeline = ValidationPipeline(
+                validation_set,
+                rules.data,
+                cache_dir=cache_dir,
+                result_cache=result_cache,
+                max_documents=max_documents,
+            )
+
+            results = validation_pipeline.validate(
+                template_paths,
+                max_errors=max_errors,
+            )
+
+        else:
+            templates = await load_templates(
+                paths,
+                file_pattern=file_pattern,
+                exclude=exclude_paths,
+                cache_dir=cache_dir,
+                typ='fast',
+            )
+
+            # Every template's already loaded, so Collections
+            # share one store rather than a mapping each.
+            documents = DocumentStore()
+            documents.update(templates)
+
+            for rule in rules.data.values():
+                rule.use_documents(documents)
+
+            template_keys: list[str] | None = None
+
+            if result_cache:
+                template_keys = await hash_templates([
+                    template_path for template_path, _ in templates
+                ])
+
+                result_cache.set_documents([
+                    (template_path, template_key)
+                    for (template_path, _), template_key in zip(templates, template_keys)
+                ])
+
+            # Evaluated off the event loop, so logging isn't held up
+            # for the length of the run.
+            results = validation_set.avalidate(
+                templates,
+                keys=dict(zip(
+                    [template_path for template_path, _ in templates],
+                    template_keys,
+                )) if template_keys else None,
+                max_errors=max_errors,
+            )
+
+        messages: list[str] = []
+
+        async for result in results:
+            if output_format == 'jsonl':
+                write_result_to_stdout(result)
+                failures += 1
+
+            else:
+                messages.append(
+                    format_validation_result(result),
+                )
+
+        validation_error = assemble_error_messages(messages)
+
+        if result_cache:
+            await logger.log(InfoLog(message=f'{result_cache.cached} rule results reused from cache, {result_cache.evaluated} evaluated'))
+
+        if validation_error:
+            raise validation_error
+        
+        templates_evaluated = (
+            validation_pipeline.templates_evaluated if pipeline else len(templates)
+        )
+
+        validation_count = validation_set.count
+
+    assert failures < 1, f'❌ Validation failed with {failures} errors'
     
-    await logger.log(InfoLog(message=f'✅ {validation_set.count} validations met for {templates_evaluated} templates'))
+    await logger.log(InfoLog(message=f'✅ {validation_count} validations met for {templates_evaluated} templates'))
     
     if config_data:
         await write_to_file(
@@ -3,13 +3,85 @@ from pydantic import ValidationError
 
 from cfn_check.shared.types import Data
 from cfn_check.evaluation.evaluator import Evaluator
+from cfn_check.evaluation.reference_index import ReferenceIndex
+from .document_store import DocumentStore
 
 class Collection:
+
+    # Set on Collections whose rules call references(), so each
+    # template's references are indexed before it's rendered.
+    index_references: bool = False
     
     def __init__(self):
-        self.documents: dict[str, Data] = {}
+        self._documents: DocumentStore = DocumentStore()
         self._evaluator = Evaluator()
 
+        # Counts reads of documents (including by query() and
+        # references()), so cached results of rules that read
+        # other documents are keyed by them as well.
+        self.document_reads = 0
+
+        if self.index_references:
+            self._evaluator.render_cache.index_references = True
+
+    @property
+    def documents(self) -> DocumentStore:
+        self.document_reads += 1
+        return self._documents
+
+    @documents.setter
+    def documents(
+        self,
+        documents: DocumentStore,
+    ):
+        self._documents = documents
+
+    def use_evaluator(
+        self,
+        evaluator: Evaluator,
+    ):
+        '''
+        Query through another Evaluator (i.e. a ValidationSet's),
+        sharing its rendered documents and memoized results.
+        '''
+        self._evaluator = evaluator
+
+        if self.index_references:
+            self._evaluator.render_cache.index_references = True
+
+    def use_documents(
+        self,
+        documents: DocumentStore,
+    ):
+        '''
+        Read documents from another store (i.e. one shared by every
+        Collection in a run, loading documents as they're queried).
+        '''
+        self.documents = documents
+
+    def references(
+        self,
+        document: str | None = None,
+    ) -> list[ReferenceIndex]:
+        '''
+        Reference indexes for every stored document, or just the
+        given one, to look up resources by logical ID and follow
+        Ref, GetAtt, Sub and DependsOn edges between them without
+        querying. Raises unless the Collection sets index_references.
+        '''
+        documents = self.documents.values()
+        if document:
+            documents = [
+                document_data
+            ] if (
+                document_data := self.documents.get(document)
+            ) is not None else []
+
+        return [
+            self._evaluator.reference_index(document_data)
+            for document_data in documents
+        ]
+
     def query(
         self,
         query: str,
@@ -20,9 +92,12 @@ class Collection:
         if document and (
             document_data := self.documents.get(document)
         ):
-            return self._evaluator.match(
-                document_data,
-                query,
+            return list(
+                self._evaluator.match(
+                    document_data,
+                    query,
+                    memoize=True,
+                )
             )
         
         results: list[tuple[str, Data]] = []
@@ -31,6 +106,7 @@ class Collection:
             result = self._evaluator.match(
                 document_data,
                 query,
+                memoize=True,
             )
 
             results.extend(result)
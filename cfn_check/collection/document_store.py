@@ -0,0 +1,217 @@
+from collections import OrderedDict
+from typing import (
+    Callable,
+    Iterable,
+    Iterator,
+    ItemsView,
+    MutableMapping,
+    ValuesView,
+)
+
+from cfn_check.shared.types import Data
+
+
+DocumentLoader = Callable[[str], Data | None]
+
+
+class DocumentItemsView(ItemsView[str, Data]):
+
+    def __iter__(self) -> Iterator[tuple[str, Data]]:
+        # Paths that fail to load are skipped rather than
+        # raising, as they're dropped once they're read.
+        for path in self._mapping:
+            if (document := self._mapping.get(path)) is not None:
+                yield (path, document)
+
+
+class DocumentValuesView(ValuesView[Data]):
+
+    def __iter__(self) -> Iterator[Data]:
+        for _, document in DocumentItemsView(self._mapping):
+            yield document
+
+
+class DocumentStore(MutableMapping[str, Data]):
+    '''
+    Maps template paths to their parsed documents. Paths added
+    without a document are loaded with the loader (i.e. from the
+    parse cache) the first time they're read, and are dropped if
+    they don't load as templates.
+
+    If max_documents is set and there's a loader to load them again,
+    the least recently read documents are evicted once more than
+    that are loaded, passing each to on_evict so anything derived from
+    it (renders, indexes, ...) can be released too. Held documents
+    are never evicted, and documents stored by hold() are evicted
+    once they're released unless they've been read in the meantime.
+
+    items() and values() load documents as they're iterated, so
+    they can be iterated under the budget. Their lengths (like the
+    store's) count paths that may yet fail to load.
+
+    The store isn't thread-safe, so documents should be read from
+    the thread evaluating them.
+    '''
+
+    def __init__(
+        self,
+        loader: DocumentLoader | None = None,
+        max_documents: int | None = None,
+        on_evict: Callable[[Data], None] | None = None,
+    ):
+        self._loader = loader
+        self._max_documents = max_documents
+        self._on_evict = on_evict
+
+        self._paths: dict[str, None] = {}
+        self._loaded: OrderedDict[str, Data] = OrderedDict()
+        self._held: dict[str, int] = {}
+        self._transient: set[str] = set()
+
+        self.loads = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._paths)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._paths))
+
+    def __contains__(
+        self,
+        path: object,
+    ):
+        return path in self._paths
+
+    def __getitem__(
+        self,
+        path: str,
+    ) -> Data:
+        if (document := self._loaded.get(path)) is not None:
+            self._loaded.move_to_end(path)
+            self._transient.discard(path)
+
+            return document
+
+        if path not in self._paths or self._loader is None:
+            raise KeyError(path)
+
+        document = self._loader(path)
+        self.loads += 1
+
+        if document is None:
+            del self._paths[path]
+            raise KeyError(path)
+
+        self._loaded[path] = document
+        self._evict(keep=path)
+
+        return document
+
+    def __setitem__(
+        self,
+        path: str,
+        document: Data,
+    ):
+        self._paths[path] = None
+        self._loaded[path] = document
+        self._loaded.move_to_end(path)
+
+        self._evict(keep=path)
+
+    def __delitem__(
+        self,
+        path: str,
+    ):
+        del self._paths[path]
+
+        self._loaded.pop(path, None)
+        self._held.pop(path, None)
+        self._transient.discard(path)
+
+    def add(
+        self,
+        paths: Iterable[str],
+    ):
+        '''
+        Add paths to be loaded the first time they're read.
+        '''
+        self._paths.update(
+            dict.fromkeys(paths),
+        )
+
+    def items(self) -> DocumentItemsView:
+        return DocumentItemsView(self)
+
+    def values(self) -> DocumentValuesView:
+        return DocumentValuesView(self)
+
+    def hold(
+        self,
+        path: str,
+        document: Data | None = None,
+    ) -> Data:
+        '''
+        Read a document (or store the given one if it isn't already
+        loaded) and keep it from being evicted until it's released.
+        '''
+        if document is not None and path not in self._loaded:
+            self[path] = document
+            self._transient.add(path)
+
+        else:
+            document = self[path]
+
+        self._held[path] = self._held.get(path, 0) + 1
+
+        return document
+
+    def release(
+        self,
+        path: str,
+    ):
+        if (held := self._held.get(path, 0)) > 1:
+            self._held[path] = held - 1
+
+        else:
+            self._held.pop(path, None)
+
+            if path in self._transient and path in self._loaded:
+                self._remove(path)
+
+        self._evict()
+
+    def clear(self):
+        self._paths.clear()
+        self._loaded.clear()
+        self._held.clear()
+        self._transient.clear()
+
+    def _evict(
+        self,
+        keep: str | None = None,
+    ):
+        # Documents without a loader can't be loaded again
+        # once evicted, so they're kept regardless.
+        if self._max_documents is None or self._loader is None:
+            return
+
+        for path in list(self._loaded):
+            if len(self._loaded) <= self._max_documents:
+                break
+
+            if path == keep or path in self._held:
+                continue
+
+            self._remove(path)
+
+    def _remove(
+        self,
+        path: str,
+    ):
+        document = self._loaded.pop(path)
+        self._transient.discard(path)
+        self.evictions += 1
+
+        if self._on_evict:
+            self._on_evict(document)
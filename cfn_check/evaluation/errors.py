@@ -2,6 +2,30 @@ import textwrap
 from pydantic import ValidationError
 from cfn_check.rules.rule import Validator
 
+from .result import ValidationResult
+
+
+def format_validation_error(
+    name: str,
+    query: str,
+    err: Exception | ValidationError | str,
+) -> str:
+    return (
+        f'Rule: {name} failed\n'
+        f'Query: {query}\n'
+        f'{str(err)}\n'
+    )
+
+
+def format_validation_result(
+    result: ValidationResult,
+) -> str:
+    return format_validation_error(
+        result.rule,
+        result.query,
+        f'Path: {result.path}\n{result.message}',
+    )
+
 
 def assemble_validation_error(
     errors: list[
@@ -10,19 +34,25 @@ def assemble_validation_error(
             Exception | ValidationError,
         ],
     ],
+) -> Exception:
+    return assemble_error_messages([
+        format_validation_error(
+            validator.name,
+            validator.query,
+            err,
+        )
+        for validator, err in errors
+    ])
+
+
+def assemble_error_messages(
+    messages: list[str],
 ) -> Exception:
     validation_error: Exception | None = None
-    if len(errors) > 0:
+    if len(messages) > 0:
 
         error_message = textwrap.indent(
-            '\n'.join([
-                (
-                    f'Rule: {validator.name} failed\n'
-                    f'Query: {validator.query}\n'
-                    f'{str(err)}\n'
-                )
-                for validator, err in errors
-            ]),
+            '\n'.join(messages),
             '\t',
         )
 
@@ -30,4 +60,4 @@ def assemble_validation_error(
             f'\n{error_message}',
         )
 
-    return validation_error
\ No newline at end of file
+    return validation_error
@@ -1,34 +1,83 @@
-from collections import deque
 from typing import Any
-from cfn_check.yaml.comments import CommentedMap, CommentedSeq
+from cfn_check.yaml.comments import CommentedMap
 
 from cfn_check.shared.types import (
     Data,
-    Items,
     YamlObject,
 )
 
-from cfn_check.rendering import Renderer
-from .parsing import QueryParser
-from .parsing.token import Token
+from cfn_check.rendering import RenderCache
+from cfn_check.validation.snapshot import SnapshotCache
+from .parsing import QueryPlan, compile_query
+from .query_trie import QueryTrie
+from .reference_index import ReferenceIndex
+from .resource_index import ResourceTypeIndex
 
 class Evaluator:
 
     def __init__(
         self,
-        flags: list[str] | None = None
+        flags: list[str] | None = None,
+        render_cache: RenderCache | None = None,
     ):
         if flags is None:
             flags = []
 
+        if render_cache is None:
+            render_cache = RenderCache(
+                mode='graph' if 'graph-render' in flags else 'tree',
+            )
+
         self.flags = flags
-        self._query_parser = QueryParser()
-        self._renderer = Renderer()
+        self.render_cache = render_cache
+        self._resource_indexes: dict[int, tuple[Data, ResourceTypeIndex]] = {}
+        self._snapshots: dict[int, tuple[Data, SnapshotCache]] = {}
+        self._reference_indexes: dict[int, tuple[Data, ReferenceIndex]] = {}
+        self._query_results: dict[
+            int,
+            tuple[Data, dict[str, list[tuple[str, Data]]]],
+        ] = {}
 
     def match(
         self,
         resources: YamlObject,
-        path: str,
+        path: str | QueryPlan,
+        attributes: dict[str, Any] | None = None,
+        availability_zones: list[str] | None = None,
+        import_values: dict[str, tuple[str, CommentedMap]] | None = None,
+        mappings: dict[str, str] | None = None,
+        parameters: dict[str, Any] | None = None,
+        references: dict[str, str] | None = None,
+        memoize: bool = False,
+    ):
+        resources = self.render(
+            resources,
+            attributes=attributes,
+            availability_zones=availability_zones,
+            import_values=import_values,
+            mappings=mappings,
+            parameters=parameters,
+            references=references,
+        )
+
+        if isinstance(path, str):
+            path = compile_query(path)
+
+        if not memoize:
+            return self._search_document(resources, path)
+
+        # Memoized per rendered document, so rules querying the
+        # same path for each of many matches only search once.
+        memo = self._memo(resources)
+        if (results := memo.get(path.query)) is None:
+            results = self._search_document(resources, path)
+            memo[path.query] = results
+
+        return results
+
+    def render(
+        self,
+        resources: YamlObject,
         attributes: dict[str, Any] | None = None,
         availability_zones: list[str] | None = None,
         import_values: dict[str, tuple[str, CommentedMap]] | None = None,
@@ -36,93 +85,187 @@ class Evaluator:
         parameters: dict[str, Any] | None = None,
         references: dict[str, str] | None = None,
     ):
-        items: Items = deque()
+        if 'no-render' in self.flags:
+            return resources
+
+        # Every validator queries the same template with the
+        # same inputs, so the rendered tree is shared via the
+        # cache rather than re-rendered per (template, validator)
+        # pair.
+        return self.render_cache.render(
+            resources,
+            attributes=attributes,
+            availability_zones=availability_zones,
+            import_values=import_values,
+            mappings=mappings,
+            parameters=parameters,
+            references=references,
+        )
+
+    def match_all(
+        self,
+        resources: YamlObject,
+        trie: QueryTrie,
+        attributes: dict[str, Any] | None = None,
+        availability_zones: list[str] | None = None,
+        import_values: dict[str, tuple[str, CommentedMap]] | None = None,
+        mappings: dict[str, str] | None = None,
+        parameters: dict[str, Any] | None = None,
+        references: dict[str, str] | None = None,
+    ):
+        resources = self.render(
+            resources,
+            attributes=attributes,
+            availability_zones=availability_zones,
+            import_values=import_values,
+            mappings=mappings,
+            parameters=parameters,
+            references=references,
+        )
+
+        # All queries in the trie are matched in one traversal
+        # of the document, returning matches per query.
+        return trie.search(
+            resources,
+            index=self.index(resources),
+        )
+
+    def index(
+        self,
+        resources: Data,
+    ):
+        # Built once per rendered document and shared by every
+        # query against it. As with the render cache, we hold the
+        # document so its id() can't be reused while indexed.
+        if (
+            cached := self._resource_indexes.get(id(resources))
+        ) and cached[0] is resources:
+            return cached[1]
         
-        if 'no-render' not in self.flags:
-            resources = self._renderer.render(
-                resources,
-                attributes=attributes,
-                availability_zones=availability_zones,
-                import_values=import_values,
-                mappings=mappings,
-                parameters=parameters,
-                references=references,
-            )
+        index = ResourceTypeIndex(resources)
+        self._resource_indexes[id(resources)] = (
+            resources,
+            index,
+        )
+
+        return index
+
+    def reference_index(
+        self,
+        resources: YamlObject,
+    ):
+        '''
+        Index the logical IDs and references of a template. Its
+        render cache must have index_references set before the
+        template is first rendered for the index to be complete,
+        so this raises a ValueError if it was rendered without.
+        '''
+        rendered = self.render(resources)
+
+        if (
+            cached := self._reference_indexes.get(id(rendered))
+        ) and cached[0] is rendered:
+            return cached[1]
+
+        # Rendering resolved most references in place, so a graph
+        # taken now would be missing edges without saying so.
+        if (
+            self.render_cache.rendered(resources)
+            and not self.render_cache.indexed(resources)
+        ):
+            raise ValueError('❌ References can only be indexed for Collections setting index_references = True')
+
+        index = ReferenceIndex(
+            rendered,
+            self.render_cache.dependencies(resources),
+        )
+
+        self._reference_indexes[id(rendered)] = (
+            rendered,
+            index,
+        )
+
+        return index
+
+    def snapshots(
+        self,
+        resources: Data,
+    ):
+        # Kept per rendered document, like the resource index,
+        # so they're dropped when the document is discarded.
+        if (
+            cached := self._snapshots.get(id(resources))
+        ) and cached[0] is resources:
+            return cached[1]
+
+        snapshots = SnapshotCache()
+        self._snapshots[id(resources)] = (
+            resources,
+            snapshots,
+        )
 
-        items.append(resources)
+        return snapshots
 
-        segments = []
-        for segment in path.split("."):
-            segments.extend(self._query_parser.parse(segment))
+    def _memo(
+        self,
+        resources: Data,
+    ):
+        if (
+            cached := self._query_results.get(id(resources))
+        ) and cached[0] is resources:
+            return cached[1]
+
+        memo: dict[str, list[tuple[str, Data]]] = {}
+        self._query_results[id(resources)] = (
+            resources,
+            memo,
+        )
+
+        return memo
+
+    def discard(
+        self,
+        resources: YamlObject,
+    ):
+        for document in [
+            resources,
+            *self.render_cache.discard(resources),
+        ]:
+            if (
+                cached := self._resource_indexes.get(id(document))
+            ) and cached[0] is document:
+                del self._resource_indexes[id(document)]
 
-        # Queries can be multi-segment,
-        # so we effectively perform per-segment
-        # repeated DFS searches, returning the matches
-        # for each segment
+            if (
+                cached := self._snapshots.get(id(document))
+            ) and cached[0] is document:
+                del self._snapshots[id(document)]
 
-        return self._search_document(resources, segments)
+            if (
+                cached := self._reference_indexes.get(id(document))
+            ) and cached[0] is document:
+                del self._reference_indexes[id(document)]
+
+            if (
+                cached := self._query_results.get(id(document))
+            ) and cached[0] is document:
+                del self._query_results[id(document)]
+
+    def clear(self):
+        self.render_cache.clear()
+        self._resource_indexes.clear()
+        self._snapshots.clear()
+        self._reference_indexes.clear()
+        self._query_results.clear()
 
     def _search_document(
         self,
         root: Any,
-        steps: list[Token],
-    ) -> list[Any]:
-        """
-        Perform breadth-first search on a ruamel.yaml tree using a list of steps.
-        
-        At each level, only keeps nodes that have children matching the current step:
-        - For CommentedMap: checks if any key matches the current step
-        - For CommentedSeq: checks if any index matches the current step
-        
-        Args:
-            root: Root of the ruamel.yaml tree
-            steps: List of strings or integers representing steps to match
-        
-        Returns:
-            List of nodes that match the full path of steps (all nodes at the final level)
-        """
-        if not steps:
-            return [root]
-        
-        # Queue for BFS: (node, current_step_index)
-        queue = deque([(root, 0)])
-        matching_nodes = []
-        path: list[str] = []
-
-        while queue:
-            node, step_idx = queue.popleft()
-            
-            # If we've consumed all steps, this node is a match
-            if step_idx >= len(steps):
-                matching_nodes.append(node)
-                continue
-            
-            current_step = steps[step_idx]
-            
-            # Check if this node has children matching the current step
-            if isinstance(node, (CommentedMap, dict)):
-                (keys, found) = current_step.match(node)
-                # Check all keys at this level
-                if keys is not None and found is not None :
-                    # This node has a matching child, add child to queue for next level
-                    for found_key, found_val in zip(keys, found):
-                        path.append(found_key)
-                        queue.append((found_val, step_idx + 1))
-
-            elif isinstance(node, (CommentedSeq, list)):
-                (keys, found) = current_step.match(node)
-                if keys is not None and found is not None :
-                    for found_key in keys:
-                        path.append(found_key)
-
-                    for found_val in found:
-                            queue.append((found_val, step_idx + 1))
-
-        results: list[tuple[str, Data]] = []
-        for idx, item in enumerate(list(matching_nodes)):
-            results.append((
-                path[idx],
-                item,
-            ))
-
-        return results
\ No newline at end of file
+        plan: QueryPlan,
+    ) -> list[tuple[str, Data]]:
+        [results] = QueryTrie([plan]).search(
+            root,
+            index=self.index(root),
+        )
+
+        return results
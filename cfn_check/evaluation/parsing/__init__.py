@@ -1 +1,5 @@
-from .query_parser import QueryParser as QueryParser
\ No newline at end of file
+from .query_parser import QueryParser as QueryParser
+from .query_plan import (
+    QueryPlan as QueryPlan,
+    compile_query as compile_query,
+)
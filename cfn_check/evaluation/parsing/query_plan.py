@@ -0,0 +1,34 @@
+import functools
+from typing import NamedTuple
+
+from .query_parser import QueryParser
+from .token import Token
+
+
+QUERY_PLAN_CACHE_SIZE = 4096
+
+
+class QueryPlan(NamedTuple):
+    query: str
+    tokens: tuple[Token, ...]
+
+
+_query_parser = QueryParser()
+
+
+@functools.lru_cache(maxsize=QUERY_PLAN_CACHE_SIZE)
+def compile_query(query: str) -> QueryPlan:
+    '''
+    Parse a dot-delimited query into an immutable plan of
+    tokens. Plans are cached by query string so repeated
+    queries (i.e. the same rule across many templates) are
+    only ever parsed once.
+    '''
+    tokens: list[Token] = []
+    for segment in query.split('.'):
+        tokens.extend(_query_parser.parse(segment))
+
+    return QueryPlan(
+        query,
+        tuple(tokens),
+    )
@@ -8,6 +8,11 @@ from cfn_check.yaml.comments import CommentedMap, CommentedSeq
 from .token_type import TokenType
 from .operators import ValueOperator
 
+
+block_or_chars = re.compile(r'\|')
+block_and_chars = re.compile(r'&')
+
+
 class Token:
 
     def __init__(
@@ -19,15 +24,33 @@ class Token:
         self.selector = selector
         self.selector_type = selector_type
         self._nested = nested
-        self._block_or_chars = re.compile(r'\|')
-        self._block_and_chars = re.compile(r'&')
 
-        segments = self._block_or_chars.split(self.selector)
+        # Tokens parsed from the same query segment share a key,
+        # which lets compiled queries be merged on common prefixes.
+        self.key = (
+            selector_type,
+            selector.pattern if isinstance(selector, re.Pattern) else selector,
+            tuple(
+                token.key for token in nested
+            ) if nested else None,
+        )
+
+        # Value operators are built once here rather than per
+        # node visited, since tokens are shared by compiled
+        # query plans.
+        self._selector_operators: list[list[ValueOperator]] = []
+        if selector_type == TokenType.VALUE_MATCH and isinstance(selector, str):
+            self._selector_operators = [
+                [
+                    ValueOperator(segment)
+                    for segment in block_and_chars.split(group)
+                ]
+                for group in block_or_chars.split(selector)
+            ]
 
-        self._selector_segments: list[list[str]] = [
-            self._block_and_chars.split(segment)
-            for segment in segments
-        ]
+    @property
+    def operators(self):
+        return self._selector_operators
 
     def match(
         self,
@@ -314,10 +337,8 @@ class Token:
 
         keys: list[str] = []
         found: list[Any] = []
-        for group in self._selector_segments:
-            for segment in group:
-
-                operator = ValueOperator(segment)
+        for group in self._selector_operators:
+            for operator in group:
 
                 match_keys: list[str] = []
                 match_found: list[Any] = []
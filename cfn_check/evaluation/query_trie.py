@@ -0,0 +1,234 @@
+from __future__ import annotations
+from collections import deque
+from typing import Any, Hashable
+from cfn_check.yaml.comments import CommentedMap, CommentedSeq
+
+from cfn_check.shared.types import Data
+
+from .parsing import QueryPlan
+from .parsing.token import Token
+from .parsing.token_type import TokenType
+from .resource_index import ResourceTypeIndex
+
+
+QueueItem = tuple[
+    Any,
+    'QueryTrieNode',
+    tuple[str, ...],
+    frozenset[Hashable] | None,
+]
+
+
+class QueryTrieNode:
+
+    __slots__ = (
+        'token',
+        'children',
+        'terminals',
+    )
+
+    def __init__(
+        self,
+        token: Token | None = None,
+    ):
+        self.token = token
+        self.children: dict[Hashable, QueryTrieNode] = {}
+        self.terminals: list[int] = []
+
+
+class QueryTrie:
+
+    def __init__(
+        self,
+        plans: list[QueryPlan],
+    ):
+        self.plans = plans
+        self.root = QueryTrieNode()
+
+        for idx, plan in enumerate(plans):
+            node = self.root
+
+            for token in plan.tokens:
+                child = node.children.get(token.key)
+                if child is None:
+                    child = QueryTrieNode(token)
+                    node.children[token.key] = child
+
+                node = child
+
+            node.terminals.append(idx)
+
+        self._resources_node = self.root.children.get((
+            TokenType.KEY,
+            'Resources',
+            None,
+        ))
+
+    def __len__(self):
+        return len(self.plans)
+
+    def search(
+        self,
+        root: Any,
+        index: ResourceTypeIndex | None = None,
+    ) -> list[list[tuple[str, Data]]]:
+        """
+        Perform a single breadth-first search on a ruamel.yaml tree for
+        every compiled query in the trie.
+
+        Queries sharing a prefix share the traversal of that prefix, so
+        each node is visited once per distinct path rather than once per
+        query. Since the queue is FIFO, matches for any one query are
+        returned in the same order a standalone search would find them.
+
+        If a resource index is given, `Resources.*.(Type == ...)` and
+        `Resources.*.(Type in ...)` steps are answered from the index
+        rather than by matching every resource.
+
+        Args:
+            root: Root of the ruamel.yaml tree
+            index: Optional resource type index built for the tree
+
+        Returns:
+            A list of (path, node) matches for each query, in the order
+            the queries were passed to the trie
+        """
+        results: list[list[tuple[str, Data]]] = [
+            [] for _ in self.plans
+        ]
+
+        # Queue for BFS: (node, trie_node, path, skipped child keys)
+        queue: deque[QueueItem] = deque([
+            (root, self.root, (), None),
+        ])
+
+        while queue:
+            node, trie_node, path, skip = queue.popleft()
+
+            # Every query whose steps end at this trie node has
+            # been fully consumed, so this node is a match for it.
+            if trie_node.terminals:
+                match_path = '.'.join(path)
+                for idx in trie_node.terminals:
+                    results[idx].append((
+                        match_path,
+                        node,
+                    ))
+
+            if not isinstance(node, (CommentedMap, dict, CommentedSeq, list)):
+                continue
+
+            indexed: dict[Hashable, frozenset[Hashable]] = {}
+            if (
+                index is not None
+                and trie_node is self._resources_node
+                and node is index.resources
+            ):
+                indexed = self._enqueue_indexed(
+                    trie_node,
+                    path,
+                    index,
+                    queue,
+                )
+
+            for child in trie_node.children.values():
+                if skip and child.token.key in skip:
+                    continue
+
+                child_skip = indexed.get(child.token.key)
+                if child_skip and not child.terminals and len(child_skip) == len(child.children):
+                    # Every step below this wildcard was answered by
+                    # the index, so there's nothing left to expand.
+                    continue
+
+                (keys, found) = child.token.match(node)
+                if keys is None or found is None:
+                    continue
+
+                keys = [
+                    self._format_key(child.token, key)
+                    for key in keys
+                ]
+
+                # Range selectors may return a single key (i.e. "0-3")
+                # for several found items.
+                for found_idx, found_val in enumerate(found):
+                    found_key = keys[min(found_idx, len(keys) - 1)] if keys else ''
+                    queue.append((
+                        found_val,
+                        child,
+                        (*path, found_key),
+                        child_skip,
+                    ))
+
+        return results
+
+    def _enqueue_indexed(
+        self,
+        trie_node: QueryTrieNode,
+        path: tuple[str, ...],
+        index: ResourceTypeIndex,
+        queue: deque[QueueItem],
+    ):
+        indexed: dict[Hashable, frozenset[Hashable]] = {}
+
+        for child in trie_node.children.values():
+            if child.token.selector_type != TokenType.WILDCARD:
+                continue
+
+            hits: list[tuple[int, int, str, str, Data, QueryTrieNode]] = []
+            answered: list[Hashable] = []
+
+            for order, grandchild in enumerate(child.children.values()):
+                if (
+                    lookup := index.lookup(grandchild.token)
+                ) is None:
+                    continue
+
+                key, resources = lookup
+                answered.append(grandchild.token.key)
+                hits.extend([
+                    (
+                        position,
+                        order,
+                        logical_id,
+                        key,
+                        resource,
+                        grandchild,
+                    ) for position, logical_id, resource in resources
+                ])
+
+            if len(answered) < 1:
+                continue
+
+            # Enqueue in the order a scan of the wildcard would
+            # have found them: by resource, then by trie child.
+            hits.sort(key=lambda hit: hit[:2])
+
+            for _, _, logical_id, key, resource, grandchild in hits:
+                queue.append((
+                    resource,
+                    grandchild,
+                    (
+                        *path,
+                        str(logical_id),
+                        self._format_key(grandchild.token, key),
+                    ),
+                    None,
+                ))
+
+            indexed[child.token.key] = frozenset(answered)
+
+        return indexed
+
+    def _format_key(
+        self,
+        token: Token,
+        key: Any,
+    ):
+        if token.selector_type == TokenType.VALUE_MATCH:
+            # Value matches filter the current node rather
+            # than descending into a child.
+            return f'({key})'
+
+        return str(key)
@@ -0,0 +1,99 @@
+from cfn_check.yaml.comments import CommentedMap
+
+from cfn_check.rendering import DependencyGraph
+from cfn_check.rendering.dependencies import EdgeKind
+from cfn_check.shared.types import Data
+
+
+REFERENCE_KINDS: tuple[EdgeKind, ...] = (
+    'Ref',
+    'GetAtt',
+    'Sub',
+    'DependsOn',
+)
+
+Reference = tuple[str, EdgeKind]
+
+
+class ReferenceIndex:
+    '''
+    Maps a template's logical IDs to its rendered resources, and to
+    the resources each one references (and is referenced by) through
+    Ref, GetAtt, Sub and DependsOn. Edges come from the template's
+    dependency graph, which has to be built before rendering as
+    rendering resolves most references away.
+    '''
+
+    def __init__(
+        self,
+        document: Data,
+        graph: DependencyGraph | None = None,
+    ):
+        self.resources: dict[str, Data] = {}
+        self.outbound: dict[str, dict[Reference, None]] = {}
+        self.inbound: dict[str, dict[Reference, None]] = {}
+
+        if isinstance(document, dict) and isinstance(
+            resources := document.get('Resources'),
+            CommentedMap,
+        ):
+            self.resources.update(resources.items())
+
+        if graph is None:
+            return
+
+        for (source_section, source), (target_section, target), kind in graph.edges:
+            if (
+                source_section != 'Resources'
+                or target_section != 'Resources'
+                or kind not in REFERENCE_KINDS
+            ):
+                continue
+
+            self.outbound.setdefault(source, {})[(target, kind)] = None
+            self.inbound.setdefault(target, {})[(source, kind)] = None
+
+    def resource(
+        self,
+        logical_id: str,
+    ) -> Data | None:
+        return self.resources.get(logical_id)
+
+    def references(
+        self,
+        logical_id: str,
+        kinds: list[EdgeKind] | None = None,
+    ) -> list[str]:
+        '''
+        Logical IDs of the resources the resource references,
+        optionally limited to the given kinds.
+        '''
+        return self._select(
+            self.outbound.get(logical_id, {}),
+            kinds,
+        )
+
+    def referenced_by(
+        self,
+        logical_id: str,
+        kinds: list[EdgeKind] | None = None,
+    ) -> list[str]:
+        '''
+        Logical IDs of the resources referencing the resource,
+        optionally limited to the given kinds.
+        '''
+        return self._select(
+            self.inbound.get(logical_id, {}),
+            kinds,
+        )
+
+    def _select(
+        self,
+        edges: dict[Reference, None],
+        kinds: list[EdgeKind] | None,
+    ):
+        return list(dict.fromkeys([
+            logical_id
+            for logical_id, kind in edges
+            if kinds is None or kind in kinds
+        ]))
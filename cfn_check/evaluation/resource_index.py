@@ -0,0 +1,103 @@
+from typing import Any, Hashable
+from cfn_check.yaml.comments import CommentedMap
+
+from cfn_check.shared.types import Data
+
+from .parsing.token import Token
+from .parsing.token_type import TokenType
+
+
+IndexedResource = tuple[int, str, CommentedMap]
+
+
+class ResourceTypeIndex:
+
+    def __init__(
+        self,
+        document: Data,
+    ):
+        self.resources: CommentedMap | None = None
+        self._types: dict[Hashable, list[IndexedResource]] = {}
+        self._lookups: dict[Hashable, tuple[str, list[IndexedResource]] | None] = {}
+
+        if not isinstance(document, dict):
+            return
+        
+        resources = document.get('Resources')
+        if not isinstance(resources, CommentedMap):
+            return
+        
+        self.resources = resources
+
+        for position, (logical_id, resource) in enumerate(resources.items()):
+            if not isinstance(resource, CommentedMap):
+                continue
+
+            # Mirrors ValueOperator, which treats a missing
+            # or empty key as an empty string.
+            resource_type = resource.get('Type') or ''
+
+            try:
+                self._types.setdefault(resource_type, []).append((
+                    position,
+                    logical_id,
+                    resource,
+                ))
+
+            except TypeError:
+                # Unhashable types (i.e. an unrendered intrinsic)
+                # can never equal a query string.
+                continue
+
+    def lookup(
+        self,
+        token: Token,
+    ) -> tuple[str, list[IndexedResource]] | None:
+        '''
+        Answer a `(Type == ...)` or `(Type in ...)` value match from
+        the index, returning the matched key and resources in document
+        order, or None if the token can't be answered by the index.
+        '''
+        if token.key in self._lookups:
+            return self._lookups[token.key]
+        
+        values = self._indexable_values(token)
+        if values is None:
+            self._lookups[token.key] = None
+            return None
+
+        matches: list[IndexedResource] = []
+        for value in values:
+            matches.extend(
+                self._types.get(value, []),
+            )
+
+        if len(values) > 1:
+            matches.sort(key=lambda match: match[0])
+
+        lookup = ('Type', matches)
+        self._lookups[token.key] = lookup
+
+        return lookup
+
+    def _indexable_values(
+        self,
+        token: Token,
+    ) -> list[Any] | None:
+        if (
+            token.selector_type != TokenType.VALUE_MATCH
+        ) or len(token.operators) != 1 or len(token.operators[0]) != 1:
+            return None
+        
+        [[operator]] = token.operators
+        if operator.key != 'Type' or operator.negate:
+            return None
+        
+        values = operator.values if operator.operator == 'in' else [operator.value]
+        
+        for value in values:
+            if not isinstance(value, str) or value == '*':
+                return None
+            
+        # Duplicate values would otherwise match a resource twice.
+        return list(dict.fromkeys(values))
@@ -0,0 +1,26 @@
+from pydantic import BaseModel
+
+from cfn_check.validation.validator import Validator, ValidatorError
+
+
+class ValidationResult(BaseModel):
+    rule: str
+    query: str
+    template: str | None = None
+    path: str
+    message: str
+
+    @classmethod
+    def from_error(
+        cls,
+        validator: Validator,
+        err: ValidatorError,
+        template: str | None = None,
+    ):
+        return cls(
+            rule=validator.name,
+            query=validator.query,
+            template=template,
+            path=str(err.path),
+            message=err.message,
+        )
@@ -0,0 +1,199 @@
+import hashlib
+import inspect
+import json
+import os
+import tempfile
+
+from pydantic import BaseModel
+
+from cfn_check.validation.validator import Validator
+
+
+RESULT_CACHE_FORMAT = 4
+
+RuleErrors = list[tuple[str, str]]
+
+# Each rule's errors, along with the key of the documents in the
+# run they were found with if the rule read any of them.
+TemplateResults = dict[str, tuple[str, RuleErrors]]
+
+
+def hash_parts(*parts: str) -> str:
+    digest = hashlib.blake2b(digest_size=20)
+
+    for part in parts:
+        digest.update(part.encode())
+        digest.update(b'\0')
+
+    return digest.hexdigest()
+
+
+class ResultCache:
+    '''
+    Persists the errors each Validator found in each template, keyed
+    by the template's content hash and the Validator's identity (a
+    hash of its function, query, transforms and model source). A
+    (rule, template) pair is only re-evaluated if either changed.
+
+    Results of rules that read other documents while evaluating a
+    template (through their Collection's documents, query() or
+    references(), however they're reached) are only reused while
+    every template in the run is unchanged. Changes to helpers a
+    rule calls aren't seen.
+
+    Results are stored as JSON, so reading a cache dir shared with
+    others (or restored in CI) can't run code.
+    '''
+
+    def __init__(
+        self,
+        cache_dir: str,
+        context: list[str] | None = None,
+    ):
+        if context is None:
+            context = []
+
+        self.cache_dir = os.path.join(cache_dir, 'results')
+        self.cached = 0
+        self.evaluated = 0
+
+        self._context = hash_parts(
+            str(RESULT_CACHE_FORMAT),
+            *context,
+        )
+
+        # As set_documents([]), until the run's documents are set
+        self._documents_key = hash_parts()
+
+    def set_documents(
+        self,
+        templates: list[tuple[str, str]],
+    ):
+        self._documents_key = hash_parts(*[
+            f'{path}:{template_key}'
+            for path, template_key in sorted(templates)
+        ])
+
+    def identify(
+        self,
+        validator: Validator,
+    ) -> str | None:
+        try:
+            source = inspect.getsource(validator.func)
+
+            parts = [
+                source,
+                validator.query,
+                validator.name,
+                *[
+                    inspect.getsource(transform)
+                    for transform in validator.transforms or []
+                ],
+            ]
+
+            parts.extend([
+                inspect.getsource(model)
+                for validator_model in validator.models
+                for model in validator_model.__mro__
+                if issubclass(model, BaseModel) and model is not BaseModel
+            ])
+
+        except (OSError, TypeError):
+            # Without source we can't tell when the rule changes,
+            # so it's evaluated every run.
+            return None
+
+        return hash_parts(*parts)
+
+    def rule_key(
+        self,
+        identity: str | None,
+    ) -> str | None:
+        if identity is None:
+            return None
+
+        return hash_parts(
+            self._context,
+            identity,
+        )
+
+    def lookup(
+        self,
+        results: TemplateResults,
+        rule_key: str | None,
+    ) -> RuleErrors | None:
+        '''
+        The rule's cached errors, or None if they're missing or
+        were found reading documents that have since changed.
+        '''
+        if rule_key is None or (cached := results.get(rule_key)) is None:
+            return None
+
+        documents_key, errors = cached
+        if documents_key and documents_key != self._documents_key:
+            return None
+
+        return errors
+
+    def record(
+        self,
+        results: TemplateResults,
+        rule_key: str,
+        errors: RuleErrors,
+        read_documents: bool = False,
+    ):
+        results[rule_key] = (
+            self._documents_key if read_documents else '',
+            errors,
+        )
+
+    def load(
+        self,
+        template_key: str,
+    ) -> TemplateResults:
+        try:
+            with open(os.path.join(self.cache_dir, f'{template_key}.json'), 'rb') as cached:
+                (cache_format, results) = json.load(cached)
+
+        except FileNotFoundError:
+            return {}
+
+        except Exception:
+            # Corrupt or truncated entries are treated as misses
+            # and overwritten once the template is re-evaluated.
+            return {}
+
+        if cache_format != RESULT_CACHE_FORMAT or not isinstance(results, dict):
+            return {}
+
+        return results
+
+    def store(
+        self,
+        template_key: str,
+        results: TemplateResults,
+    ):
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        (fd, temp_path) = tempfile.mkstemp(
+            dir=self.cache_dir,
+            suffix='.tmp',
+        )
+
+        try:
+            with os.fdopen(fd, 'w') as cached:
+                json.dump(
+                    [RESULT_CACHE_FORMAT, results],
+                    cached,
+                )
+
+            os.replace(
+                temp_path,
+                os.path.join(self.cache_dir, f'{template_key}.json'),
+            )
+
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+            raise
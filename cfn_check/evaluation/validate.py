@@ -1,15 +1,39 @@
-from typing import Any
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterable, AsyncIterator, Iterable, Iterator
 
-from pydantic import ValidationError
 from cfn_check.yaml.comments import TaggedScalar, CommentedMap, CommentedSeq
 
-from cfn_check.validation.validator import Validator
+from cfn_check.rendering import RenderCache
+from cfn_check.validation.snapshot import SnapshotCache
+from cfn_check.validation.validator import Validator, ValidatorError
 from cfn_check.shared.types import (
+    Data,
     YamlObject,
 )
 
-from .errors import assemble_validation_error
+from .errors import assemble_error_messages, format_validation_result
 from .evaluator import Evaluator
+from .query_trie import QueryTrie
+from .result import ValidationResult
+from .result_cache import ResultCache
+
+
+def get_document_reads(validator: Validator) -> int:
+    # Rules are bound to their Collection, which counts reads
+    # of its documents however the rule reaches them.
+    return getattr(
+        getattr(validator.func, '__self__', None),
+        'document_reads',
+        0,
+    )
+
+
+async def iterate_async(items: Iterable[Any]):
+    for item in items:
+        yield item
+
 
 class ValidationSet:
 
@@ -23,13 +47,26 @@ class ValidationSet:
         mappings: dict[str, str] | None = None,
         parameters: dict[str, Any] | None = None,
         references: dict[str, str] | None = None,
+        render_cache: RenderCache | None = None,
+        result_cache: ResultCache | None = None,
     ):
         
         if flags is None:
             flags = []
 
-        self._evaluator = Evaluator(flags=flags)
+        self._evaluator = Evaluator(
+            flags=flags,
+            render_cache=render_cache,
+        )
         self._validators = validators
+        self._query_trie = QueryTrie([
+            validator.plan for validator in validators
+        ])
+
+        self._results = result_cache
+        self._rule_identities = [
+            result_cache.identify(validator) for validator in validators
+        ] if result_cache else []
 
         self._attributes: dict[str, str] | None = attributes
         self._availability_zones: list[str] | None = availability_zones
@@ -41,51 +78,362 @@ class ValidationSet:
         self._parameters: dict[str, str] | None = parameters
         self._references: dict[str, str] | None = references
 
+    @property
+    def evaluator(self):
+        return self._evaluator
+
     @property
     def count(self):
         return len(self._validators)
 
     def validate(
         self,
-        templates: list[str],
+        templates: list[YamlObject],
+        keys: list[str] | None = None,
+        max_errors: int | None = None,
     ):
-        errors: list[Exception | ValidationError] = []
+        if validation_error := assemble_error_messages([
+            format_validation_result(result)
+            for result in self.iter_results(
+                templates,
+                keys=keys,
+                max_errors=max_errors,
+            )
+        ]):
+            return validation_error
 
-        for template in templates:
-            for validator in self._validators:
-                if errs := self._match_validator(
-                    validator,
+    def iter_results(
+        self,
+        templates: list[YamlObject],
+        paths: list[str] | None = None,
+        keys: list[str] | None = None,
+        max_errors: int | None = None,
+    ) -> Iterator[ValidationResult]:
+        '''
+        Yield a result for each failure as each template is
+        evaluated, rather than collecting them for the whole run.
+        '''
+        if paths is None:
+            paths = [None] * len(templates)
+
+        if keys is None:
+            keys = [None] * len(templates)
+
+        error_count = 0
+
+        try:
+            for template, path, key in zip(templates, paths, keys):
+                for validator, err in self.evaluate(
                     template,
+                    key=key,
+                    max_errors=(
+                        None if max_errors is None else max_errors - error_count
+                    ),
                 ):
-                    errors.extend([
-                        (
+                    error_count += 1
+                    yield ValidationResult.from_error(
+                        validator,
+                        err,
+                        template=path,
+                    )
+
+                if max_errors is not None and error_count >= max_errors:
+                    break
+
+        finally:
+            # Rendered trees are only shared for the duration
+            # of a run, so we release them once it completes.
+            self.clear()
+
+    async def avalidate(
+        self,
+        templates: Iterable[tuple[str, YamlObject]] | AsyncIterable[tuple[str, YamlObject]],
+        keys: dict[str, str] | None = None,
+        max_errors: int | None = None,
+        executor: ThreadPoolExecutor | None = None,
+    ) -> AsyncIterator[ValidationResult]:
+        '''
+        As iter_results, but each (path, template) is evaluated in the
+        executor (the loop's default if None) so the event loop isn't
+        blocked, yielding results as each template completes.
+
+        Templates are evaluated one at a time. If they're given as an
+        async iterable, the next is loaded while the previous one is
+        evaluated, though cross-document queries then only see the
+        documents added to Collections so far.
+        '''
+        loop = asyncio.get_running_loop()
+
+        if keys is None:
+            keys = {}
+
+        if not isinstance(templates, AsyncIterable):
+            templates = iterate_async(templates)
+
+        error_count = 0
+        evaluating: tuple[str, asyncio.Future] | None = None
+
+        try:
+            async for path, template in templates:
+                if evaluating:
+                    (evaluating_path, evaluated) = evaluating
+                    evaluating = None
+
+                    for validator, err in await evaluated:
+                        error_count += 1
+                        yield ValidationResult.from_error(
                             validator,
-                            err
-                        ) for err in errs
-                    ])
+                            err,
+                            template=evaluating_path,
+                        )
 
-        if validation_error := assemble_validation_error(errors):
-            return validation_error 
+                    if max_errors is not None and error_count >= max_errors:
+                        return
 
-    def _match_validator(
+                evaluating = (
+                    path,
+                    loop.run_in_executor(
+                        executor,
+                        functools.partial(
+                            self.evaluate,
+                            template,
+                            key=keys.get(path),
+                            max_errors=(
+                                None if max_errors is None else max_errors - error_count
+                            ),
+                        ),
+                    ),
+                )
+
+            if evaluating:
+                (evaluating_path, evaluated) = evaluating
+                evaluating = None
+
+                for validator, err in await evaluated:
+                    yield ValidationResult.from_error(
+                        validator,
+                        err,
+                        template=evaluating_path,
+                    )
+
+        finally:
+            if evaluating:
+                # Wait out an evaluation still running if we stopped
+                # early, so it isn't racing clear() on the caches.
+                await asyncio.gather(
+                    evaluating[1],
+                    return_exceptions=True,
+                )
+
+            self.clear()
+
+    def evaluate(
         self,
-        validator: Validator,
-        template: str,
+        template: YamlObject,
+        key: str | None = None,
+        max_errors: int | None = None,
     ):
-        found = self._evaluator.match(
-            template, 
-            validator.query,
+        if self._results is None or key is None:
+            return self._evaluate(
+                template,
+                max_errors=max_errors,
+            )
+
+        results = self._results.load(key)
+        rule_keys = [
+            self._results.rule_key(identity)
+            for identity in self._rule_identities
+        ]
+
+        cached = [
+            self._results.lookup(results, rule_key)
+            for rule_key in rule_keys
+        ]
+
+        stale = [
+            rule_errors is None for rule_errors in cached
+        ]
+
+        evaluated: dict[int, list[ValidatorError]] = {}
+        read_documents: dict[int, bool] = {}
+        if any(stale):
+            for validator, err in self._evaluate(
+                template,
+                stale,
+                read_documents=read_documents,
+            ):
+                evaluated.setdefault(id(validator), []).append(err)
+
+        errors: list[
+            tuple[
+                Validator,
+                ValidatorError,
+            ]
+        ] = []
+
+        for validator, rule_key, rule_errors in zip(
+            self._validators,
+            rule_keys,
+            cached,
+        ):
+            if rule_errors is None:
+                errs = evaluated.get(id(validator), [])
+                errors.extend([
+                    (validator, err) for err in errs
+                ])
+
+                if rule_key is not None:
+                    self._results.record(
+                        results,
+                        rule_key,
+                        [
+                            (err.path, err.message) for err in errs
+                        ],
+                        read_documents=read_documents.get(id(validator), False),
+                    )
+
+            else:
+                errors.extend([
+                    (validator, ValidatorError(path, message))
+                    for path, message in rule_errors
+                ])
+
+        self._results.evaluated += stale.count(True)
+        self._results.cached += stale.count(False)
+
+        if any(
+            is_stale and rule_key is not None
+            for rule_key, is_stale in zip(rule_keys, stale)
+        ):
+            self._results.store(key, results)
+
+        # Templates with stale results are evaluated in full so
+        # complete results are stored, then trimmed to the limit.
+        return errors[:max_errors]
+
+    def _evaluate(
+        self,
+        template: YamlObject,
+        include: list[bool] | None = None,
+        max_errors: int | None = None,
+        read_documents: dict[int, bool] | None = None,
+    ):
+        errors: list[
+            tuple[
+                Validator,
+                ValidatorError,
+            ]
+        ] = []
+
+        found = self._evaluator.match_all(
+            template,
+            self._query_trie,
+            attributes=self._attributes,
+            availability_zones=self._availability_zones,
+            import_values=self._import_values,
+            mappings=self._mappings,
+            parameters=self._parameters,
+            references=self._references,
+        )
+
+        # Served from the render cache, to find the snapshots
+        # for the rendered document the matches came from.
+        snapshots = self._evaluator.snapshots(
+            self.render(template),
+        )
+
+        for idx, (validator, matches) in enumerate(
+            zip(self._validators, found),
+        ):
+            if include and not include[idx]:
+                continue
+
+            document_reads = get_document_reads(validator)
+
+            if errs := self._match_validator(
+                validator,
+                matches,
+                snapshots=snapshots,
+                max_errors=(
+                    None if max_errors is None else max_errors - len(errors)
+                ),
+            ):
+                errors.extend([
+                    (
+                        validator,
+                        err
+                    ) for err in errs
+                ])
+
+            if read_documents is not None:
+                read_documents[id(validator)] = (
+                    get_document_reads(validator) > document_reads
+                )
+
+            if max_errors is not None and len(errors) >= max_errors:
+                break
+
+        return errors
+
+    def render(
+        self,
+        template: YamlObject,
+    ):
+        return self._evaluator.render(
+            template,
+            attributes=self._attributes,
+            availability_zones=self._availability_zones,
+            import_values=self._import_values,
+            mappings=self._mappings,
+            parameters=self._parameters,
+            references=self._references,
         )
 
+    def discard(
+        self,
+        template: YamlObject,
+    ):
+        self._evaluator.discard(template)
+
+    def clear(self):
+        self._evaluator.clear()
+
+    def _match_validator(
+        self,
+        validator: Validator,
+        found: list[tuple[str, Data]],
+        snapshots: SnapshotCache | None = None,
+        max_errors: int | None = None,
+    ):
         # assert len(found) > 0, f"❌ No results matching results for query {validator.query}"
 
-        errors: list[Exception | ValidationError] = []
+        errors: list[ValidatorError] = []
 
 
-        for matched in found:
-            if err := validator(matched):
+        if validator.batched:
+            results = validator.call_batch(
+                found,
+                snapshots=snapshots,
+            )
+
+        else:
+            results = (
+                validator(
+                    matched,
+                    snapshots=snapshots,
+                ) for matched in found
+            )
+
+        for matched, err in zip(found, results):
+            if err:
+                if not isinstance(err, ValidatorError):
+                    # Rules may return an error rather than raise
+                    err = ValidatorError(matched[0], str(err))
+
                 errors.append(err)
 
+            if max_errors is not None and len(errors) >= max_errors:
+                break
+
         if len(errors) > 0:
             return errors
-        
\ No newline at end of file
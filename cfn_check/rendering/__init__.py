@@ -1 +1,5 @@
-from .renderer import Renderer as Renderer
\ No newline at end of file
+from .renderer import Renderer as Renderer
+from .renderer import RenderMode as RenderMode
+from .dependencies import DependencyGraph as DependencyGraph
+from .dependencies import DependencyCycleError as DependencyCycleError
+from .render_cache import RenderCache as RenderCache
@@ -0,0 +1,293 @@
+from __future__ import annotations
+import re
+from collections import deque
+from typing import Any, Literal
+from cfn_check.yaml.tag import Tag
+from cfn_check.yaml.comments import TaggedScalar, CommentedMap, CommentedSeq
+
+from cfn_check.shared.types import YamlObject
+
+
+Section = Literal[
+    'Parameters',
+    'Conditions',
+    'Mappings',
+    'Resources',
+]
+
+EdgeKind = Literal[
+    'Ref',
+    'GetAtt',
+    'Condition',
+    'FindInMap',
+    'Sub',
+    'DependsOn',
+]
+
+Symbol = tuple[Section, str]
+Edge = tuple[Symbol, Symbol, EdgeKind]
+
+
+SECTIONS: tuple[Section, ...] = (
+    'Parameters',
+    'Mappings',
+    'Conditions',
+    'Resources',
+)
+
+sub_variable_pattern = re.compile(r'\$\{([^!][^}]*)\}')
+
+
+class DependencyCycleError(Exception):
+
+    def __init__(self, cycle: list[Symbol]):
+        self.cycle = cycle
+
+        super().__init__(
+            'Circular dependency between ' + ' -> '.join([
+                f'{section}.{name}' for section, name in cycle
+            ])
+        )
+
+
+class DependencyGraph:
+
+    def __init__(
+        self,
+        template: YamlObject,
+    ):
+        self.symbols: dict[Symbol, Any] = {}
+        self.edges: list[Edge] = []
+        self.dependencies: dict[Symbol, dict[Symbol, None]] = {}
+        self.dependents: dict[Symbol, dict[Symbol, None]] = {}
+
+        for section in SECTIONS:
+            if not isinstance(
+                nodes := template.get(section),
+                CommentedMap,
+            ):
+                continue
+
+            for name, node in nodes.items():
+                symbol: Symbol = (section, name)
+                self.symbols[symbol] = node
+                self.dependencies[symbol] = {}
+                self.dependents[symbol] = {}
+
+        for symbol, node in self.symbols.items():
+            for target, kind in self._find_references(symbol, node):
+                self._add_edge(symbol, target, kind)
+
+    def order(self) -> list[Symbol]:
+        '''
+        Returns symbols ordered so each appears after everything it
+        depends on (Kahn's algorithm), ties broken by template order.
+        Raises a DependencyCycleError if no such order exists.
+        '''
+        remaining = {
+            symbol: len(dependencies)
+            for symbol, dependencies in self.dependencies.items()
+        }
+
+        ready = deque([
+            symbol for symbol, count in remaining.items() if count == 0
+        ])
+
+        ordered: list[Symbol] = []
+        while ready:
+            symbol = ready.popleft()
+            ordered.append(symbol)
+
+            for dependent in self.dependents[symbol]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    ready.append(dependent)
+
+        if len(ordered) < len(self.symbols):
+            raise DependencyCycleError(
+                self._find_cycle({
+                    symbol for symbol, count in remaining.items() if count > 0
+                })
+            )
+
+        return ordered
+
+    def _find_cycle(
+        self,
+        unresolved: set[Symbol],
+    ) -> list[Symbol]:
+        # Every unresolved symbol has at least one unresolved
+        # dependency, so walking those edges must revisit a symbol.
+        symbol = next(iter(
+            symbol for symbol in self.symbols if symbol in unresolved
+        ))
+
+        path: list[Symbol] = []
+        seen: dict[Symbol, int] = {}
+
+        while symbol not in seen:
+            seen[symbol] = len(path)
+            path.append(symbol)
+            symbol = next(iter(
+                dependency
+                for dependency in self.dependencies[symbol]
+                if dependency in unresolved
+            ))
+
+        return path[seen[symbol]:] + [symbol]
+
+    def _add_edge(
+        self,
+        source: Symbol,
+        target: Symbol | None,
+        kind: EdgeKind,
+    ):
+        if target is None:
+            return
+
+        self.edges.append((source, target, kind))
+
+        self.dependencies[source][target] = None
+        self.dependents[target][source] = None
+
+    def _resolve_name(
+        self,
+        name: Any,
+        sections: tuple[Section, ...],
+    ) -> Symbol | None:
+        if not isinstance(name, str):
+            return None
+
+        for section in sections:
+            if (section, name) in self.symbols:
+                return (section, name)
+
+        return None
+
+    def _find_references(
+        self,
+        symbol: Symbol,
+        root: Any,
+    ):
+        section, _ = symbol
+        references: list[tuple[Symbol | None, EdgeKind]] = []
+
+        if section == 'Resources' and isinstance(root, CommentedMap):
+            depends_on = root.get('DependsOn')
+            if isinstance(depends_on, str):
+                depends_on = [depends_on]
+
+            if isinstance(depends_on, list):
+                references.extend([
+                    (
+                        self._resolve_name(dependency, ('Resources',)),
+                        'DependsOn',
+                    ) for dependency in depends_on
+                ])
+
+        stack: list[Any] = [root]
+        while stack:
+            node = stack.pop()
+
+            tag = node.tag.value if isinstance(
+                node,
+                (TaggedScalar, CommentedMap, CommentedSeq),
+            ) and isinstance(node.tag, Tag) else None
+
+            if isinstance(node, TaggedScalar):
+                references.extend(
+                    self._match_function(tag, node.value)
+                )
+
+            elif isinstance(node, CommentedMap):
+                if tag:
+                    references.extend(
+                        self._match_function(tag, node)
+                    )
+
+                for key, value in node.items():
+                    # Long-form intrinsics, plus resource-level and
+                    # nested `Condition: <name>` references.
+                    if isinstance(key, str) and (
+                        key in ('Ref', 'Condition') or key.startswith('Fn::')
+                    ):
+                        references.extend(
+                            self._match_function(key, value)
+                        )
+
+                    stack.append(value)
+
+            elif isinstance(node, CommentedSeq):
+                if tag:
+                    references.extend(
+                        self._match_function(tag, node)
+                    )
+
+                stack.extend(node)
+
+        return references
+
+    def _match_function(
+        self,
+        function: str | None,
+        value: Any,
+    ) -> list[tuple[Symbol | None, EdgeKind]]:
+        match function:
+            case '!Ref' | 'Ref':
+                return [(
+                    self._resolve_name(value, ('Parameters', 'Resources')),
+                    'Ref',
+                )]
+
+            case '!GetAtt' | 'Fn::GetAtt':
+                if isinstance(value, str):
+                    value = value.split('.', maxsplit=1)
+
+                if isinstance(value, list) and len(value) > 0:
+                    return [(
+                        self._resolve_name(value[0], ('Resources',)),
+                        'GetAtt',
+                    )]
+
+            case '!Condition' | 'Condition':
+                return [(
+                    self._resolve_name(value, ('Conditions',)),
+                    'Condition',
+                )]
+
+            case '!If' | 'Fn::If':
+                if isinstance(value, list) and len(value) > 0:
+                    return [(
+                        self._resolve_name(value[0], ('Conditions',)),
+                        'Condition',
+                    )]
+
+            case '!FindInMap' | 'Fn::FindInMap':
+                if isinstance(value, list) and len(value) > 0:
+                    return [(
+                        self._resolve_name(value[0], ('Mappings',)),
+                        'FindInMap',
+                    )]
+
+            case '!Sub' | 'Fn::Sub':
+                local_variables: dict[str, Any] = {}
+                if isinstance(value, list) and len(value) > 1 and isinstance(value[1], dict):
+                    local_variables = value[1]
+
+                if isinstance(value, list) and len(value) > 0:
+                    value = value[0]
+
+                if isinstance(value, str):
+                    return [
+                        (
+                            self._resolve_name(
+                                variable.split('.', maxsplit=1)[0],
+                                ('Parameters', 'Resources'),
+                            ),
+                            'Sub',
+                        )
+                        for variable in sub_variable_pattern.findall(value)
+                        if variable not in local_variables
+                    ]
+
+        return []
@@ -0,0 +1,186 @@
+from typing import Any, Hashable
+from cfn_check.yaml.comments import CommentedMap
+
+from cfn_check.shared.types import (
+    Data,
+    YamlObject,
+)
+
+from .dependencies import DependencyGraph
+from .renderer import Renderer, RenderMode
+
+
+RenderKey = tuple[int, Hashable]
+
+
+def freeze_render_input(value: Any) -> Hashable:
+    '''
+    Convert render inputs (dicts/lists of scalars and parsed
+    templates) into a hashable key. Parsed templates passed as
+    import values are keyed by identity rather than content.
+    '''
+    if isinstance(value, CommentedMap):
+        return ('id', id(value))
+
+    elif isinstance(value, dict):
+        return tuple(sorted(
+            (
+                str(key),
+                freeze_render_input(val),
+            ) for key, val in value.items()
+        ))
+
+    elif isinstance(value, (list, tuple)):
+        return tuple(
+            freeze_render_input(val) for val in value
+        )
+
+    try:
+        hash(value)
+        return value
+
+    except TypeError:
+        return ('id', id(value))
+
+
+class RenderCache:
+
+    def __init__(
+        self,
+        mode: RenderMode = 'tree',
+        index_references: bool = False,
+    ):
+        self.mode = mode
+        self.index_references = index_references
+        self._rendered: dict[RenderKey, tuple[YamlObject, Data]] = {}
+        self._graphs: dict[int, tuple[YamlObject, DependencyGraph]] = {}
+
+    def __len__(self):
+        return len(self._rendered)
+
+    def render(
+        self,
+        template: YamlObject,
+        attributes: dict[str, Any] | None = None,
+        availability_zones: list[str] | None = None,
+        import_values: dict[str, tuple[str, CommentedMap]] | None = None,
+        mappings: dict[str, str] | None = None,
+        parameters: dict[str, Any] | None = None,
+        references: dict[str, str] | None = None,
+    ) -> Data:
+        key: RenderKey = (
+            id(template),
+            freeze_render_input((
+                attributes,
+                availability_zones,
+                import_values,
+                mappings,
+                parameters,
+                references,
+            )),
+        )
+
+        # We hold a reference to the source template alongside
+        # the result so its id() cannot be recycled by another
+        # template while the entry is alive.
+        if (
+            cached := self._rendered.get(key)
+        ) and cached[0] is template:
+            return cached[1]
+
+        if self.index_references and self.mode != 'graph':
+            # Rendering rewrites the template in place, resolving
+            # most references, so the graph is taken beforehand.
+            self.dependencies(template)
+
+        renderer = Renderer(mode=self.mode)
+        rendered = renderer.render(
+            template,
+            attributes=attributes,
+            availability_zones=availability_zones,
+            import_values=import_values,
+            mappings=mappings,
+            parameters=parameters,
+            references=references,
+        )
+
+        self._rendered[key] = (template, rendered)
+
+        if (
+            self.index_references
+            and renderer.dependency_graph is not None
+            and id(template) not in self._graphs
+        ):
+            # Graph rendering builds one before rendering anyway
+            self._graphs[id(template)] = (
+                template,
+                renderer.dependency_graph,
+            )
+
+        return rendered
+
+    def rendered(
+        self,
+        template: YamlObject,
+    ) -> bool:
+        return any(
+            source is template for source, _ in self._rendered.values()
+        )
+
+    def indexed(
+        self,
+        template: YamlObject,
+    ) -> bool:
+        return bool(
+            (cached := self._graphs.get(id(template))) and cached[0] is template
+        )
+
+    def dependencies(
+        self,
+        template: YamlObject,
+    ) -> DependencyGraph:
+        '''
+        The template's dependency graph, as of its first render with
+        index_references set. Templates that were already rendered
+        without it are graphed as they are now, which misses the
+        references rendering resolved.
+        '''
+        if (
+            cached := self._graphs.get(id(template))
+        ) and cached[0] is template:
+            return cached[1]
+
+        graph = DependencyGraph(template)
+        self._graphs[id(template)] = (
+            template,
+            graph,
+        )
+
+        return graph
+
+    def discard(
+        self,
+        template: YamlObject,
+    ) -> list[Data]:
+        '''
+        Drop every cached render of the template, returning the
+        rendered trees that were dropped.
+        '''
+        if (
+            cached := self._graphs.get(id(template))
+        ) and cached[0] is template:
+            del self._graphs[id(template)]
+
+        keys = [
+            key
+            for key, (source, _) in self._rendered.items()
+            if source is template
+        ]
+
+        return [
+            self._rendered.pop(key)[1] for key in keys
+        ]
+
+    def clear(self):
+        self._rendered.clear()
+        self._graphs.clear()
@@ -2,11 +2,12 @@ from __future__ import annotations
 import base64
 import json
 import re
-from typing import Callable, Any
+from typing import Callable, Any, Hashable, Literal
 from collections import deque
 from cfn_check.yaml.tag import Tag
 from cfn_check.yaml.comments import TaggedScalar, CommentedMap, CommentedSeq
 from .cidr_solver import IPv4CIDRSolver
+from .dependencies import DependencyGraph
 from .utils import assign
 
 from cfn_check.shared.types import (
@@ -23,9 +24,19 @@ Resolver = Callable[
     CommentedMap | CommentedSeq | TaggedScalar | YamlObject,
 ]
 
+RenderMode = Literal['tree', 'graph']
+
+
+_unresolved = object()
+
+
 class Renderer:
 
-    def __init__(self):
+    def __init__(
+        self,
+        mode: RenderMode = 'tree',
+    ):
+        self.mode = mode
         self.items: Items = deque()
         self._sub_pattern = re.compile(r'\$\{([\w+::]+)\}')
         self._sub_inner_text_pattern = re.compile(r'[\$|\{|\}]+')
@@ -45,6 +56,18 @@ class Renderer:
         ] = {}
         self._availability_zones = CommentedSeq()
 
+        # Identity-keyed indexes over the template being rendered
+        # so parent, key and replacement lookups don't require a
+        # full traversal from the root.
+        self._indexed_root: CommentedMap | None = None
+        self._parents: dict[int, tuple[Any, Any, Any]] = {}
+        self._keys: dict[Any, dict[int, CommentedMap]] = {}
+
+        # In graph mode, symbols are resolved once in dependency
+        # order and intrinsic results are memoized by their inputs.
+        self.dependency_graph: DependencyGraph | None = None
+        self._memoized: dict[tuple[str, Hashable], Any] = {}
+
         self._inline_functions = {
             'Fn::ForEach': re.compile(r'Fn::ForEach::\w+'),
             'Fn::If': re.compile(r'Fn::If'),
@@ -147,8 +170,115 @@ class Renderer:
         self._resources = template.get('Resources', CommentedMap())
         self._conditions = template.get('Conditions', CommentedMap())
 
+        self._index_tree(template)
+
+        if self.mode == 'graph':
+            self._resolve_dependencies(template)
+
         return self._resolve_tree(template)
 
+    def _resolve_dependencies(self, root: YamlObject):
+        self._memoized.clear()
+        self.dependency_graph = DependencyGraph(root)
+
+        # Raises on circular dependencies, before any rendering.
+        for section, name in self.dependency_graph.order():
+            if isinstance(name, str) and name.startswith('Fn::'):
+                # Inline functions (i.e. Fn::ForEach) rewrite their
+                # parent, so they're left to the tree walk.
+                continue
+
+            match section:
+                case 'Conditions':
+                    self._memoized[('Condition', name)] = self._resolve_symbol(
+                        root,
+                        self._conditions,
+                        name,
+                    )
+
+                case 'Resources':
+                    self._resolve_symbol(
+                        root,
+                        self._resources,
+                        name,
+                    )
+
+    def _resolve_symbol(
+        self,
+        root: YamlObject,
+        section: CommentedMap,
+        name: str,
+    ):
+        node = section.get(name)
+
+        if isinstance(
+            node,
+            (TaggedScalar, CommentedMap, CommentedSeq),
+        ) and isinstance(node.tag, Tag) and node.tag.value is not None:
+            resolved = self._resolve_tagged(root, node)
+            if resolved is None:
+                return node
+            
+            if isinstance(resolved, (CommentedMap, CommentedSeq)):
+                resolved = self._resolve_subtree(root, resolved)
+
+        else:
+            resolved = self._resolve_subtree(root, node)
+
+        if resolved is not node:
+            self._assign(section, name, resolved)
+
+        return resolved
+
+    def _memoize(
+        self,
+        kind: str,
+        key: Hashable | None,
+        resolve: Callable[[], Any],
+    ):
+        if self.mode != 'graph' or key is None:
+            return resolve()
+        
+        try:
+            memo_key = (kind, key)
+            if (
+                cached := self._memoized.get(memo_key, _unresolved)
+            ) is not _unresolved:
+                return cached
+            
+        except TypeError:
+            return resolve()
+        
+        result = resolve()
+        self._memoized[memo_key] = result
+
+        return result
+    
+    def _memo_key(self, node: Any) -> Hashable | None:
+        # Only intrinsic arguments made entirely of scalars (or
+        # tagged scalars) are memoized, since they can be keyed
+        # by value.
+        if isinstance(node, TaggedScalar):
+            return (
+                node.tag.value if isinstance(node.tag, Tag) else None,
+                node.value,
+            )
+        
+        elif isinstance(node, CommentedSeq):
+            keys = [
+                self._memo_key(item) for item in node
+            ]
+
+            if any([key is None for key in keys]):
+                return None
+
+            return tuple(keys)
+        
+        elif isinstance(node, (str, int, float, bool)):
+            return node
+        
+        return None
+
     def _resolve_tree(self, root: YamlObject):
         self.items.clear()
         self.items.append((None, None, root))
@@ -161,20 +291,20 @@ class Renderer:
                 accessor,
                 node,
             ):
-                root.update(match)
+                self._update_root(root, match)
             
             if isinstance(node, TaggedScalar):
                 # Replace in parent
                 if parent is not None and (
                     resolved := self._resolve_tagged(root, node)
                 ) is not None:
-                    parent[accessor] = resolved
+                    self._assign(parent, accessor, resolved)
 
             elif isinstance(node, CommentedMap):
                 if isinstance(node.tag, Tag) and node.tag.value is not None and parent:
                     resolved_node = self._resolve_tagged(root, node)
                     if resolved_node is not None:
-                        parent[accessor] = resolved_node
+                        self._assign(parent, accessor, resolved_node)
                         # Push children to continue traversal into resolved node
                         if isinstance(resolved_node, CommentedMap):
                             for k in reversed(list(resolved_node.keys())):
@@ -202,7 +332,7 @@ class Renderer:
                 if isinstance(node.tag, Tag) and node.tag.value is not None and parent:
                     resolved_node = self._resolve_tagged(root, node)
                     if resolved_node is not None:
-                        parent[accessor] = resolved_node
+                        self._assign(parent, accessor, resolved_node)
                         # Push children to continue traversal into resolved node
                         if isinstance(resolved_node, CommentedMap):
                             for k in reversed(list(resolved_node.keys())):
@@ -288,9 +418,13 @@ class Renderer:
             return ref
 
         else:
-            return self._resolve_subtree(
-                root,
-                self._find_matching_key(root, scalar.value),
+            return self._memoize(
+                'Ref',
+                scalar.value,
+                lambda: self._resolve_subtree(
+                    root,
+                    self._find_matching_key(root, scalar.value),
+                ),
             )
     
     def _resolve_getatt(
@@ -316,12 +450,24 @@ class Renderer:
             '.'.join(steps)
         ):
             return value
+        
+        if len(steps) < 1:
+            return None
 
+        return self._memoize(
+            'GetAtt',
+            self._memo_key(CommentedSeq(steps)),
+            lambda: self._find_attribute(steps),
+        )
+    
+    def _find_attribute(
+        self,
+        steps: list[str],
+    ):
         current = self._resources.get(steps[0], CommentedMap()).get(
             'Properties',
             CommentedMap(),
         )
-
         for step in steps[1:]:
             if step == 'Value':
                 return current
@@ -461,6 +607,7 @@ class Renderer:
         resolved_items = CommentedMap()
         for item in collection:
             self._references[identifier] = item
+            self._invalidate_references()
             resolved_items.update(
                 self._resolve_foreach_item(
                     root,
@@ -470,6 +617,14 @@ class Renderer:
         
         return resolved_items
     
+    def _invalidate_references(self):
+        # Mapping lookups may resolve !Ref keys against loop
+        # references, which change on every iteration.
+        for memo_key in list(self._memoized.keys()):
+            kind, _ = memo_key
+            if kind == 'FindInMap':
+                del self._memoized[memo_key]
+
     def _resolve_foreach_item(
         self,
         root: CommentedMap,
@@ -590,7 +745,13 @@ class Renderer:
         ):
             condition_key = self._resolve_subtree(root, condition_key)
 
-        result = self._resolve_subtree(root, self._conditions.get(condition_key))
+        # Conditions resolved up front in graph mode don't need
+        # to be re-evaluated for every !If that references them.
+        if not isinstance(condition_key, str) or (
+            'Condition',
+            condition_key,
+        ) not in self._memoized:
+            result = self._resolve_subtree(root, self._conditions.get(condition_key))
 
         true_result = source[1]
         if isinstance(
@@ -614,6 +775,12 @@ class Renderer:
         ):
             return source
         
+        if isinstance(
+            memoized := self._memoized.get(('Condition', source.value)),
+            bool,
+        ):
+            return memoized
+        
         if (
             condition := self._conditions.get(source.value)
         ) and isinstance(
@@ -749,7 +916,7 @@ class Renderer:
                 if parent is not None and (
                     resolved := self._resolve_tagged(root, node)
                 ) is not None:
-                    parent[accessor] = resolved
+                    self._assign(parent, accessor, resolved)
 
                 elif (
                     resolved := self._resolve_tagged(root, node)
@@ -760,7 +927,7 @@ class Renderer:
                 if isinstance(node.tag, Tag) and node.tag.value is not None and parent and node != source:
                     resolved_node = self._resolve_tagged(root, node)
                     if resolved_node is not None:
-                        parent[accessor] = resolved_node
+                        self._assign(parent, accessor, resolved_node)
                         # Push children to continue traversal into resolved node
                         if isinstance(resolved_node, CommentedMap):
                             for k in reversed(list(resolved_node.keys())):
@@ -787,7 +954,7 @@ class Renderer:
                 if isinstance(node.tag, Tag) and node.tag.value is not None and parent and node != source:
                     resolved_node = self._resolve_tagged(root, node)
                     if resolved_node is not None:
-                        parent[accessor] = resolved_node
+                        self._assign(parent, accessor, resolved_node)
                         # Push children to continue traversal into resolved node
                         if isinstance(resolved_node, CommentedMap):
                             for k in reversed(list(resolved_node.keys())):
@@ -993,6 +1160,39 @@ class Renderer:
         if root is target:
             return replacement
         
+        if root is not self._indexed_root:
+            return self._scan_replace_target(
+                root,
+                target,
+                replacement,
+                matcher_pattern,
+            )
+        
+        parent, accessor = self._find_parent(root, target)
+        if parent is None:
+            return root
+        
+        for key in list(target.keys()):
+            if matcher_pattern.match(key):
+                del target[key]
+
+        if isinstance(replacement, CommentedMap):
+            target.update(replacement)
+            for key in replacement.keys():
+                self._index_subtree(target[key], target, key)
+
+        else:
+            self._assign(parent, accessor, replacement)
+
+        return root
+
+    def _scan_replace_target(
+        self,
+        root: CommentedMap,
+        target: CommentedMap,
+        replacement: Any,
+        matcher_pattern: re.Pattern
+    ) -> CommentedMap: 
         stack: list[tuple[Any, Any | None, Any | None]] = [(root, None, None)]
         
         while stack:
@@ -1065,7 +1265,7 @@ class Renderer:
                     accessor,
                     node,
             ):
-                root.update(match)
+                self._update_root(root, match)
                 # At this point we've likely (and completely)
                 # successfully nuked the source from orbit
                 # so we need to fetch it from the source parent
@@ -1078,7 +1278,7 @@ class Renderer:
                 if parent is not None and (
                     resolved := self._resolve_tagged(root, node)
                 ) is not None:
-                    parent[accessor] = resolved
+                    self._assign(parent, accessor, resolved)
 
                 elif (
                     resolved := self._resolve_tagged(root, node)
@@ -1089,7 +1289,7 @@ class Renderer:
                 if isinstance(node.tag, Tag) and node.tag.value is not None and parent:
                     resolved_node = self._resolve_tagged(root, node)
                     if resolved_node is not None:
-                        parent[accessor] = resolved_node
+                        self._assign(parent, accessor, resolved_node)
                         # Push children to continue traversal into resolved node
                         if isinstance(resolved_node, CommentedMap):
                             for k in reversed(list(resolved_node.keys())):
@@ -1116,7 +1316,7 @@ class Renderer:
                 if isinstance(node.tag, Tag) and node.tag.value is not None and parent:
                     resolved_node = self._resolve_tagged(root, node)
                     if resolved_node is not None:
-                        parent[accessor] = resolved_node
+                        self._assign(parent, accessor, resolved_node)
                         # Push children to continue traversal into resolved node
                         if isinstance(resolved_node, CommentedMap):
                             for k in reversed(list(resolved_node.keys())):
@@ -1149,6 +1349,17 @@ class Renderer:
         self, 
         root: CommentedMap, 
         subset: CommentedMap | CommentedSeq,
+    ) -> YamlObject | None:
+        return self._memoize(
+            'FindInMap',
+            self._memo_key(subset),
+            lambda: self._find_in_map(root, subset),
+        )
+
+    def _find_in_map(
+        self, 
+        root: CommentedMap, 
+        subset: CommentedMap | CommentedSeq,
     ) -> YamlObject | None:
         """
         Traverse `subset` iteratively. For every leaf (scalar or TaggedScalar) encountered in `subset`,
@@ -1218,7 +1429,30 @@ class Renderer:
         root: CommentedMap, 
         search_key: str,
     ):
-        """Returns the first path (list of keys/indices) to a mapping with key == search_key, and the value at that path."""
+        """Returns the value of the first mapping (in depth-first order) with key == search_key."""
+        if root is not self._indexed_root:
+            return self._scan_matching_key(root, search_key)
+        
+        try:
+            candidates = self._keys.get(search_key)
+
+        except TypeError:
+            return None
+
+        if candidates is None:
+            return None
+        
+        for node in candidates.values():
+            if search_key in node and self._is_attached(node):
+                return node[search_key]
+
+        return None  # No match found
+    
+    def _scan_matching_key(
+        self,
+        root: CommentedMap, 
+        search_key: str,
+    ):
         stack = [(root, [])]
         while stack:
             node, path = stack.pop()
@@ -1238,6 +1472,23 @@ class Renderer:
         root: CommentedMap,
         target: CommentedMap,
     ) -> CommentedMap: 
+        if root is not self._indexed_root:
+            return self._scan_parent(root, target)
+        
+        if not isinstance(target, CommentedMap) or not self._is_attached(target):
+            return None, None
+        
+        _, parent, accessor = self._parents[id(target)]
+        if parent is None:
+            return None, None
+
+        return parent, accessor
+    
+    def _scan_parent(
+        self,
+        root: CommentedMap,
+        target: CommentedMap,
+    ) -> CommentedMap: 
         
         stack: list[tuple[Any, Any | None, Any | None]] = [(root, None, None)]
         
@@ -1262,6 +1513,88 @@ class Renderer:
         
         return None, None
     
+    def _index_tree(
+        self,
+        root: CommentedMap,
+    ):
+        self._indexed_root = root
+        self._parents.clear()
+        self._keys.clear()
+
+        self._index_subtree(root, None, None)
+
+    def _index_subtree(
+        self,
+        node: Any,
+        parent: CommentedMap | CommentedSeq | None,
+        accessor: Any | None,
+    ):
+        # Pushing children in reverse gives a pre-order walk, so
+        # mappings are recorded per key in depth-first order.
+        stack: list[tuple[Any, Any | None, Any | None]] = [(node, parent, accessor)]
+
+        while stack:
+            node, parent, accessor = stack.pop()
+
+            if isinstance(node, CommentedMap):
+                self._parents[id(node)] = (node, parent, accessor)
+                for k in node.keys():
+                    self._keys.setdefault(k, {})[id(node)] = node
+
+                for k in reversed(list(node.keys())):
+                    stack.append((node[k], node, k))
+
+            elif isinstance(node, CommentedSeq):
+                self._parents[id(node)] = (node, parent, accessor)
+                for idx in reversed(range(len(node))):
+                    stack.append((node[idx], node, idx))
+
+    def _assign(
+        self,
+        parent: CommentedMap | CommentedSeq,
+        accessor: Any,
+        value: Any,
+    ):
+        parent[accessor] = value
+        self._index_subtree(value, parent, accessor)
+
+    def _update_root(
+        self,
+        root: CommentedMap,
+        match: CommentedMap,
+    ):
+        root.update(match)
+        if match is not root:
+            for key in match.keys():
+                self._index_subtree(root[key], root, key)
+
+    def _is_attached(
+        self,
+        node: CommentedMap | CommentedSeq,
+    ):
+        # Index entries go stale as nodes are replaced, so we
+        # confirm each link up to the root still holds.
+        while True:
+            entry = self._parents.get(id(node))
+            if entry is None or entry[0] is not node:
+                return False
+            
+            _, parent, accessor = entry
+            if parent is None:
+                return node is self._indexed_root
+            
+            if isinstance(parent, CommentedMap) and (
+                accessor not in parent or parent[accessor] is not node
+            ):
+                return False
+            
+            elif isinstance(parent, CommentedSeq) and (
+                not 0 <= accessor < len(parent) or parent[accessor] is not node
+            ):
+                return False
+            
+            node = parent
+
     def _assemble_parameters(self, resources: YamlObject):
         params: dict[str, Data] = resources.get("Parameters", {})
         for param_name, param in params.items():
@@ -1,6 +1,7 @@
 from typing import TypeVar
 from pydantic import BaseModel, JsonValue
 from typing import Callable
+from cfn_check.evaluation.parsing import QueryPlan, compile_query
 from cfn_check.validation.validator import Validator
 
 
@@ -16,6 +17,7 @@ class Rule:
         transforms: list[Callable[[JsonValue], JsonValue]] | None = None
     ):
         self.query = query
+        self.plan: QueryPlan = compile_query(query)
         self.name = name
         self.transforms = transforms
 
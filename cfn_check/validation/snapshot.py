@@ -0,0 +1,81 @@
+from collections import OrderedDict
+from typing import Any
+
+from cfn_check.shared.types import Data
+
+
+def to_plain(node: Any) -> Data:
+    '''
+    Copy a parsed or rendered node into plain dicts and lists,
+    leaving scalars as they are.
+    '''
+    if isinstance(node, dict):
+        return _map_to_plain(node)
+
+    elif isinstance(node, list):
+        return _seq_to_plain(node)
+
+    return node
+
+
+def _map_to_plain(node: dict) -> dict:
+    # CommentedMap's Python-level items() and __getitem__ are
+    # several times slower than the underlying C views. Merged
+    # keys are stored in the map itself, so nothing is skipped.
+    items = (
+        OrderedDict.items(node) if isinstance(node, OrderedDict) else dict.items(node)
+    )
+
+    return {
+        key: (
+            _map_to_plain(value) if isinstance(value, dict)
+            else _seq_to_plain(value) if isinstance(value, list)
+            else value
+        ) for key, value in items
+    }
+
+
+def _seq_to_plain(node: list) -> list:
+    return [
+        (
+            _map_to_plain(value) if isinstance(value, dict)
+            else _seq_to_plain(value) if isinstance(value, list)
+            else value
+        ) for value in list.__iter__(node)
+    ]
+
+
+class SnapshotCache:
+    '''
+    Plain dict/list snapshots of the nodes in a rendered document,
+    so the same node is converted once however many models are
+    validated against it.
+    '''
+
+    def __init__(self):
+        self._snapshots: dict[int, tuple[Data, Data]] = {}
+
+    def __len__(self):
+        return len(self._snapshots)
+
+    def get(
+        self,
+        node: Data,
+    ) -> Data:
+        # As with the render cache, we hold the node so its
+        # id() cannot be recycled while the snapshot is alive.
+        if (
+            cached := self._snapshots.get(id(node))
+        ) and cached[0] is node:
+            return cached[1]
+
+        snapshot = to_plain(node)
+        self._snapshots[id(node)] = (
+            node,
+            snapshot,
+        )
+
+        return snapshot
+
+    def clear(self):
+        self._snapshots.clear()
@@ -1,13 +1,123 @@
-from typing import TypeVar, Generic
-from pydantic import BaseModel, ValidationError, JsonValue
-from typing import Callable, get_type_hints
+import types
+from collections.abc import Iterable, Mapping
+from typing import Annotated, Any, Literal, TypeVar, Generic, Union
+from pydantic import BaseModel, TypeAdapter, ValidationError, JsonValue
+from typing import Callable, Iterator, get_args, get_origin, get_type_hints
 
+from cfn_check.evaluation.parsing import QueryPlan, compile_query
 from cfn_check.shared.types import Data
+from .snapshot import SnapshotCache, to_plain
 
 
 T = TypeVar("T", bound= JsonValue | BaseModel)
 
 
+def find_models(annotation: Any) -> list[type[BaseModel]]:
+    '''
+    Find the models in a type annotation, including those nested
+    in generics and unions (i.e. `list[Model]`, `Model | None`).
+    '''
+    if get_origin(annotation) is None and isinstance(annotation, type):
+        return [annotation] if issubclass(annotation, BaseModel) else []
+
+    return [
+        model
+        for arg in get_args(annotation)
+        for model in find_models(arg)
+    ]
+
+
+def find_adapted_types(annotation: Any) -> tuple[type, ...]:
+    '''
+    The matched containers validated against the annotation: dicts
+    for models and mappings, and lists for sequences (i.e. `list[Model]`).
+    Other matches are passed to the rule as they are.
+    '''
+    origin = get_origin(annotation)
+
+    if origin is Annotated:
+        return find_adapted_types(get_args(annotation)[0])
+
+    elif origin is Union or origin is types.UnionType:
+        return tuple(dict.fromkeys([
+            adapted_type
+            for arg in get_args(annotation)
+            for adapted_type in find_adapted_types(arg)
+        ]))
+
+    container = origin if origin is not None else annotation
+    if not isinstance(container, type):
+        return ()
+
+    elif issubclass(container, (BaseModel, Mapping)):
+        return (dict,)
+
+    elif issubclass(container, Iterable) and not issubclass(container, (str, bytes)):
+        return (list,)
+
+    return ()
+
+
+def shares_input(
+    annotation: Any,
+    seen: set[type[BaseModel]] | None = None,
+) -> bool:
+    '''
+    Whether values validated against the annotation can hold
+    references into the validated input, so mutating them would
+    mutate it. Fields typed Any or as untyped containers, and extra
+    fields on models allowing them, are kept as given.
+    '''
+    if seen is None:
+        seen = set()
+
+    if annotation is Any or annotation is object:
+        return True
+
+    origin = get_origin(annotation)
+
+    if origin is Annotated:
+        return shares_input(get_args(annotation)[0], seen)
+
+    elif origin is Literal:
+        return False
+
+    elif origin is not None:
+        return any(
+            shares_input(arg, seen) for arg in get_args(annotation)
+        )
+
+    elif not isinstance(annotation, type):
+        # Type variables, forward references and aliases
+        # (i.e. JsonValue) can't be inspected cheaply.
+        return True
+
+    elif issubclass(annotation, BaseModel):
+        if annotation in seen:
+            return False
+
+        seen.add(annotation)
+
+        return annotation.model_config.get('extra') == 'allow' or any(
+            shares_input(field.annotation, seen)
+            for field in annotation.model_fields.values()
+        )
+
+    return annotation in (dict, list, set, frozenset, tuple)
+
+
+class ValidatorError(Exception):
+
+    def __init__(
+        self,
+        path: str,
+        message: str,
+    ):
+        super().__init__(f'Path: {path}\n{message}')
+        self.path = path
+        self.message = message
+
+
 class Validator(Generic[T]):
     def __init__(
         self,
@@ -18,21 +128,50 @@ class Validator(Generic[T]):
     ):
         self.func = func
         self.query = query
+        self.plan: QueryPlan = compile_query(query)
         self.name = name
         self.transforms = transforms
 
-        self.model: BaseModel | None = None
+        self.models: list[type[BaseModel]] = []
+        self.adapter: TypeAdapter | None = None
+        self.batch_adapter: TypeAdapter | None = None
+        self.adapted_types: tuple[type, ...] = ()
+
+        # Cached snapshots are shared by every model validated
+        # against a node, so they're only used when validated
+        # values can't hold references into them.
+        self.uses_snapshots = False
 
-        for _, param in get_type_hints(
+        for param_name, param in get_type_hints(
             self.func,
         ).items():
-            if param in BaseModel.__subclasses__():
-                self.model = param
+            if param_name == 'return':
+                continue
 
-    def __call__(self, arg: tuple[str, Data]):
+            # The first annotated parameter is the matched value.
+            # Annotations without models are passed through as-is.
+            if models := find_models(param):
+                self.models = models
+                self.adapter = TypeAdapter(param)
+                self.batch_adapter = TypeAdapter(list[param])
+                self.adapted_types = find_adapted_types(param)
+                self.uses_snapshots = not shares_input(param)
+
+            break
+
+    @property
+    def batched(self):
+        return self.batch_adapter is not None and not self.transforms
+
+    def __call__(
+        self,
+        arg: tuple[str, Data],
+        snapshots: SnapshotCache | None = None,
+    ):
 
         try:
             path, item = arg
+            matched = item
 
             if self.transforms:
                 for transform in self.transforms:
@@ -41,17 +180,115 @@ class Validator(Generic[T]):
                     if item is None:
                         return
 
-            if self.model and isinstance(item, dict):
-                item = self.model(**item)
+            if self.adapter is not None and isinstance(item, self.adapted_types):
+                # Models validate plain dicts and lists, which are
+                # cheaper for pydantic to walk than parsed nodes.
+                # Transformed items may be new objects, so only the
+                # matched node itself is cached.
+                item = self.adapter.validate_python(
+                    snapshots.get(item) if (
+                        snapshots is not None and self.uses_snapshots and item is matched
+                    ) else to_plain(item)
+                )
 
             return self.func(item)
         
-        except ValidationError as err:
-            return Exception(
-                f'Path: {path}\n❌ Validation Error: {str(err)}'
-            )
-        
         except Exception as err:
-            return Exception(
-                f'Path: {path}\nError: {str(err)}'
+            return self._create_error(path, err)
+
+    def call_batch(
+        self,
+        found: list[tuple[str, Data]],
+        snapshots: SnapshotCache | None = None,
+    ) -> Iterator[ValidatorError | None]:
+        '''
+        As calling the Validator on each match in turn, but every
+        match of the adapted types is validated against the model in
+        one call. Only for Validators without transforms.
+        '''
+        indexes = [
+            idx for idx, (_, item) in enumerate(found)
+            if isinstance(item, self.adapted_types)
+        ]
+
+        items = [
+            snapshots.get(found[idx][1]) if (
+                snapshots is not None and self.uses_snapshots
+            ) else to_plain(found[idx][1])
+            for idx in indexes
+        ]
+
+        validated: dict[int, Any] = {}
+        failed: dict[int, Exception] = {}
+
+        try:
+            validated = dict(zip(
+                indexes,
+                self.batch_adapter.validate_python(items),
+            ))
+
+            failing: list[int] = []
+
+        except ValidationError as err:
+            failing = sorted({
+                error['loc'][0]
+                for error in err.errors(
+                    include_url=False,
+                    include_context=False,
+                    include_input=False,
+                )
+            })
+
+            passing = [
+                position for position in range(len(items))
+                if position not in failing
+            ]
+
+            validated = dict(zip(
+                [indexes[position] for position in passing],
+                self.batch_adapter.validate_python([
+                    items[position] for position in passing
+                ]),
+            ))
+
+        except Exception:
+            # Other errors (i.e. raised by a model's validators)
+            # abort the batch without saying which match raised
+            # them, so every match is validated alone.
+            failing = list(range(len(items)))
+
+        # Failures are re-validated alone so their errors read
+        # exactly as they would for a single match.
+        for position in failing:
+            try:
+                validated[indexes[position]] = self.adapter.validate_python(items[position])
+
+            except Exception as item_err:
+                failed[indexes[position]] = item_err
+
+        for idx, (path, item) in enumerate(found):
+            if idx in failed:
+                yield self._create_error(path, failed[idx])
+                continue
+
+            try:
+                yield self.func(validated.get(idx, item))
+
+            except Exception as err:
+                yield self._create_error(path, err)
+
+    def _create_error(
+        self,
+        path: str,
+        err: Exception,
+    ):
+        if isinstance(err, ValidationError):
+            return ValidatorError(
+                path,
+                f'❌ Validation Error: {str(err)}',
             )
+
+        return ValidatorError(
+            path,
+            f'Error: {str(err)}',
+        )
@@ -38,7 +38,7 @@ from typing import Any, Dict, List, Set, Iterator, Union, Optional  # NOQA
 
 
 __all__ = ['BaseConstructor', 'SafeConstructor', 'Constructor',
-           'ConstructorError', 'RoundTripConstructor']
+           'ConstructorError', 'RoundTripConstructor', 'FastConstructor']
 # fmt: on
 
 
@@ -1720,3 +1720,52 @@ for tag in 'null int float binary timestamp omap pairs set str seq map'.split():
     RoundTripConstructor.add_default_constructor(tag)
 
 RoundTripConstructor.add_constructor(None, RoundTripConstructor.construct_unknown)
+
+
+class FastConstructor(RoundTripConstructor):
+    """builds the same container and tag types as the RoundTripConstructor,
+    but skips comment, line/col and collection style bookkeeping as the
+    result is never dumped back out
+    """
+
+    def construct_mapping(self, node: Any, maptyp: Any, deep: bool = False) -> Any:  # type: ignore # NOQA
+        if not isinstance(node, MappingNode):
+            raise ConstructorError(
+                None, None, f'expected a mapping node, but found {node.id!s}', node.start_mark,
+            )
+        merge_map = self.flatten_mapping(node)
+        for key_node, value_node in node.value:
+            # keys can be list -> deep
+            key = self.construct_object(key_node, deep=True)
+            # lists are not hashable, but tuples are
+            if not isinstance(key, Hashable):
+                if isinstance(key, MutableSequence):
+                    key = CommentedKeySeq(key)
+                elif isinstance(key, MutableMapping):
+                    key = CommentedKeyMap(key)
+            if not isinstance(key, Hashable):
+                raise ConstructorError(
+                    'while constructing a mapping',
+                    node.start_mark,
+                    'found unhashable key',
+                    key_node.start_mark,
+                )
+            value = self.construct_object(value_node, deep=deep)
+            if self.check_mapping_key(node, key_node, maptyp, key, value):
+                maptyp[key] = value
+        if merge_map:
+            maptyp.add_yaml_merge(merge_map)
+
+    def construct_yaml_seq(self, node: Any) -> Iterator[CommentedSeq]:
+        data = CommentedSeq()
+        yield data
+        data.extend(self.construct_sequence(node))
+
+    def construct_yaml_map(self, node: Any) -> Iterator[CommentedMap]:
+        data = CommentedMap()
+        yield data
+        self.construct_mapping(node, data, deep=True)
+
+
+for tag in 'seq map'.split():
+    FastConstructor.add_default_constructor(tag)
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+from cfn_check.yaml.error import YAMLError
+from cfn_check.yaml.events import (
+    AliasEvent,
+    DocumentEndEvent,
+    DocumentStartEvent,
+    MappingEndEvent,
+    MappingStartEvent,
+    ScalarEvent,
+    SequenceEndEvent,
+    SequenceStartEvent,
+    StreamEndEvent,
+    StreamStartEvent,
+)
+from cfn_check.yaml.tag import Tag
+
+from typing import Any, Optional  # NOQA
+
+try:
+    from _ruamel_yaml import CParser  # type: ignore
+except:  # NOQA
+    CParser = None
+
+__all__ = ['CEventParser', 'CEventParserError']
+
+
+class CEventParserError(YAMLError):
+    """
+    raised for any reader/scanner/parser error from the C parser. libyaml is
+    stricter than the pure Parser (it rejects stacked tags such as
+    `!Base64 !Ref Value`), so callers may want to retry with pure=True
+    """
+
+
+class CEventParser:
+    """
+    Event parser backed by the C level reader>scanner>parser of _ruamel_yaml.
+
+    The C extension builds events (and nodes) from the ruamel.yaml package,
+    which the pure Composer and constructors in this package don't recognise,
+    so events are translated as they are pulled. Only the scanning/parsing
+    moves to C; composing and constructing stay in Python, so tags such as
+    !Ref or !Sub become the same TaggedScalar/tagged containers as with the
+    pure Parser. Comments are not available from the C parser.
+    """
+
+    def __init__(self, loader: Any) -> None:
+        self.loader = loader
+        if self.loader is not None and getattr(self.loader, '_parser', None) is None:
+            self.loader._parser = self
+        self._cparser: Any = None
+        self.reset_parser()
+
+    @classmethod
+    def available(cls) -> bool:
+        return CParser is not None
+
+    @property
+    def stream(self) -> Any:
+        return self._cparser
+
+    @stream.setter
+    def stream(self, stream: Any) -> None:
+        self.dispose()
+        self._cparser = CParser(stream)
+
+    def reset_parser(self) -> None:
+        self.current_event = self.last_event = None
+
+    def dispose(self) -> None:
+        if self._cparser is not None:
+            self._cparser.dispose()
+            self._cparser = None
+        self.reset_parser()
+
+    def check_event(self, *choices: Any) -> bool:
+        # Check the type of the next event.
+        if self.current_event is None:
+            self.current_event = self.next_event()
+        if self.current_event is not None:
+            if not choices:
+                return True
+            for choice in choices:
+                if isinstance(self.current_event, choice):
+                    return True
+        return False
+
+    def peek_event(self) -> Any:
+        # Get the next event.
+        if self.current_event is None:
+            self.current_event = self.next_event()
+        return self.current_event
+
+    def get_event(self) -> Any:
+        # Get the next event and proceed further.
+        if self.current_event is None:
+            self.current_event = self.next_event()
+        self.last_event = value = self.current_event
+        self.current_event = None
+        return value
+
+    def next_event(self) -> Any:
+        try:
+            event = self._cparser.get_event()
+        except Exception as exc:
+            raise CEventParserError(str(exc)) from exc
+        return self.translate(event)
+
+    def translate(self, event: Any) -> Any:
+        if event is None:
+            return None
+        translate = _translators.get(type(event).__name__)
+        if translate is None:
+            raise TypeError(f'unexpected event from CParser: {event!r}')
+        return translate(event)
+
+
+def _translate_tag(tag: Optional[str]) -> Optional[Tag]:
+    # The C parser has already expanded tag handles, so the
+    # full tag (i.e. "!Ref") is kept as the suffix.
+    if tag is None:
+        return None
+    return Tag(suffix=tag)
+
+
+def _translate_style(style: Optional[str]) -> Optional[str]:
+    # The C parser reports plain scalars with an empty style
+    return style or None
+
+
+_translators = {
+    'StreamStartEvent': lambda event: StreamStartEvent(
+        event.start_mark, event.end_mark, encoding=event.encoding,
+    ),
+    'StreamEndEvent': lambda event: StreamEndEvent(event.start_mark, event.end_mark),
+    'DocumentStartEvent': lambda event: DocumentStartEvent(
+        event.start_mark,
+        event.end_mark,
+        explicit=event.explicit,
+        version=event.version,
+        tags=event.tags,
+    ),
+    'DocumentEndEvent': lambda event: DocumentEndEvent(
+        event.start_mark, event.end_mark, explicit=event.explicit,
+    ),
+    'AliasEvent': lambda event: AliasEvent(event.anchor, event.start_mark, event.end_mark),
+    'ScalarEvent': lambda event: ScalarEvent(
+        event.anchor,
+        _translate_tag(event.tag),
+        event.implicit,
+        event.value,
+        event.start_mark,
+        event.end_mark,
+        style=_translate_style(event.style),
+    ),
+    'SequenceStartEvent': lambda event: SequenceStartEvent(
+        event.anchor,
+        _translate_tag(event.tag),
+        event.implicit,
+        event.start_mark,
+        event.end_mark,
+        flow_style=event.flow_style,
+    ),
+    'SequenceEndEvent': lambda event: SequenceEndEvent(event.start_mark, event.end_mark),
+    'MappingStartEvent': lambda event: MappingStartEvent(
+        event.anchor,
+        _translate_tag(event.tag),
+        event.implicit,
+        event.start_mark,
+        event.end_mark,
+        flow_style=event.flow_style,
+    ),
+    'MappingEndEvent': lambda event: MappingEndEvent(event.start_mark, event.end_mark),
+}
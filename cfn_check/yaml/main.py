@@ -31,6 +31,7 @@ from cfn_check.yaml.constructor import (
     SafeConstructor,
     Constructor,
     RoundTripConstructor,
+    FastConstructor,
 )
 from cfn_check.yaml.loader import Loader as RuamelLoader  # NOQA
 from cfn_check.yaml.comments import CommentedMap, CommentedSeq, C_PRE
@@ -39,6 +40,7 @@ from cfn_check.yaml.parser import Parser, RoundTripParserSC, RoundTripParser
 from cfn_check.yaml.serializer import Serializer
 from cfn_check.yaml.scanner import RoundTripScannerSC, RoundTripScanner, Scanner
 from cfn_check.yaml.reader import Reader
+from cfn_check.yaml.cparser import CEventParser
 
 from typing import List, Set, Dict, Tuple, Union, Any, Callable, Optional, Text, Type  # NOQA
 from cfn_check.yaml.compat import StreamType, StreamTextType, VersionType  # NOQA
@@ -73,6 +75,10 @@ class YAML:
              'full'    -> full Dumper only, including python built-ins that are
                           potentially unsafe to load
              'base'    -> baseloader
+             'fast'    -> round-trip types (incl. tags) without comments,
+                          line/col info or preserved quotes, for loading
+                          documents that are never dumped back. Uses the
+                          C parser for events when available (and not pure)
         pure: if True only use Python modules
         input/output: needed to work as context manager
         plug_ins: a list of plug-in files
@@ -137,6 +143,18 @@ class YAML:
             self.Parser = Parser if pure or CParser is None else CParser
             # self.Composer = ruamel.yaml.composer.Composer
             # self.Constructor = ruamel.yaml.constructor.Constructor
+        elif 'fast' in self.typ:
+            self.default_flow_style = False
+            self.Emitter = RoundTripEmitter
+            self.Serializer = Serializer
+            self.Representer = RoundTripRepresenter
+            if pure or not CEventParser.available():
+                self.Scanner = Scanner
+                self.Parser = Parser
+            else:
+                self.Parser = CEventParser
+            self.Composer = Composer
+            self.Constructor = FastConstructor
         elif 'rtsc' in self.typ:
             self.default_flow_style = False
             # no optimized rt-dumper yet
@@ -498,7 +516,10 @@ class YAML:
                 raise YAMLError(
                      "\nyou can only use yaml=YAML(typ='full') for dumping\n",  # NOQA
                 )
-        if self.Parser is not CParser:
+        if self.Parser is CEventParser:
+            # the C parser reads the stream itself
+            self.parser.stream = stream
+        elif self.Parser is not CParser:
             if self.Reader is None:
                 self.Reader = Reader
             if self.Scanner is None:
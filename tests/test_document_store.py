@@ -0,0 +1,189 @@
+from cfn_check.collection.document_store import DocumentStore
+
+
+class Loader:
+
+    def __init__(
+        self,
+        failing: set[str] | None = None,
+    ):
+        self.failing = failing or set()
+        self.loaded: list[str] = []
+
+    def __call__(self, path: str):
+        self.loaded.append(path)
+
+        if path in self.failing:
+            return None
+
+        return {'Path': path}
+
+
+def create_store(
+    max_documents: int | None = None,
+    failing: set[str] | None = None,
+):
+    loader = Loader(failing=failing)
+    evicted: list[str] = []
+
+    documents = DocumentStore(
+        loader=loader,
+        max_documents=max_documents,
+        on_evict=lambda document: evicted.append(document['Path']),
+    )
+
+    return documents, loader, evicted
+
+
+def test_documents_are_loaded_when_first_read():
+    documents, loader, _ = create_store()
+    documents.add(['a.yaml', 'b.yaml'])
+
+    assert loader.loaded == []
+    assert list(documents) == ['a.yaml', 'b.yaml']
+
+    assert documents['a.yaml'] == {'Path': 'a.yaml'}
+    assert documents['a.yaml'] == {'Path': 'a.yaml'}
+
+    assert loader.loaded == ['a.yaml']
+    assert documents.loads == 1
+
+
+def test_documents_that_fail_to_load_are_dropped():
+    documents, _, _ = create_store(failing={'b.yaml'})
+    documents.add(['a.yaml', 'b.yaml'])
+
+    assert documents.get('b.yaml') is None
+    assert 'b.yaml' not in documents
+    assert list(documents) == ['a.yaml']
+
+
+def test_least_recently_read_documents_are_evicted():
+    documents, loader, evicted = create_store(max_documents=2)
+    documents.add(['a.yaml', 'b.yaml', 'c.yaml'])
+
+    documents['a.yaml']
+    documents['b.yaml']
+    documents['a.yaml']
+    documents['c.yaml']
+
+    assert evicted == ['b.yaml']
+    assert documents.evictions == 1
+
+    # Evicted documents are loaded again when they're next read
+    assert documents['b.yaml'] == {'Path': 'b.yaml'}
+    assert loader.loaded == ['a.yaml', 'b.yaml', 'c.yaml', 'b.yaml']
+    assert evicted == ['b.yaml', 'a.yaml']
+
+
+def test_held_documents_are_not_evicted():
+    documents, _, evicted = create_store(max_documents=1)
+    documents.add(['a.yaml', 'b.yaml', 'c.yaml'])
+
+    documents.hold('a.yaml')
+    documents['b.yaml']
+    documents['c.yaml']
+
+    assert evicted == ['b.yaml']
+
+    documents.release('a.yaml')
+
+    assert evicted == ['b.yaml', 'a.yaml']
+
+
+def test_documents_held_more_than_once_are_kept_until_released_by_each():
+    documents, _, evicted = create_store(max_documents=1)
+    documents.add(['a.yaml', 'b.yaml'])
+
+    documents.hold('a.yaml')
+    documents.hold('a.yaml')
+    documents['b.yaml']
+
+    documents.release('a.yaml')
+    assert evicted == ['b.yaml']
+
+    documents.release('a.yaml')
+    assert evicted == ['b.yaml']
+
+    documents['b.yaml']
+    assert evicted == ['b.yaml', 'a.yaml']
+
+
+def test_held_documents_are_removed_on_release_unless_read():
+    documents, loader, evicted = create_store()
+    documents.add(['a.yaml', 'b.yaml'])
+
+    documents.hold('a.yaml', {'Path': 'a.yaml'})
+    documents.hold('b.yaml', {'Path': 'b.yaml'})
+
+    # Reading a held document (i.e. from another document's
+    # query) keeps it loaded once it's released.
+    documents['b.yaml']
+
+    documents.release('a.yaml')
+    documents.release('b.yaml')
+
+    assert loader.loaded == []
+    assert evicted == ['a.yaml']
+    assert list(documents) == ['a.yaml', 'b.yaml']
+
+
+def test_documents_without_a_loader_are_never_evicted():
+    evicted: list[str] = []
+    documents = DocumentStore(
+        max_documents=1,
+        on_evict=lambda document: evicted.append(document['Path']),
+    )
+
+    documents.update({
+        'a.yaml': {'Path': 'a.yaml'},
+        'b.yaml': {'Path': 'b.yaml'},
+    })
+
+    assert evicted == []
+    assert dict(documents) == {
+        'a.yaml': {'Path': 'a.yaml'},
+        'b.yaml': {'Path': 'b.yaml'},
+    }
+
+
+def test_views_load_lazily_and_can_be_iterated_again():
+    documents, loader, evicted = create_store(
+        max_documents=1,
+        failing={'b.yaml'},
+    )
+    documents.add(['a.yaml', 'b.yaml', 'c.yaml'])
+
+    values = documents.values()
+    items = documents.items()
+
+    assert len(values) == 3
+    assert loader.loaded == []
+
+    assert list(values) == [{'Path': 'a.yaml'}, {'Path': 'c.yaml'}]
+    assert list(values) == [{'Path': 'a.yaml'}, {'Path': 'c.yaml'}]
+    assert list(items) == [
+        ('a.yaml', {'Path': 'a.yaml'}),
+        ('c.yaml', {'Path': 'c.yaml'}),
+    ]
+
+    # Each document is evicted as the next is loaded, so
+    # iterating never loads more than the budget.
+    assert len(values) == 2
+    assert evicted == ['a.yaml', 'c.yaml', 'a.yaml', 'c.yaml', 'a.yaml']
+
+
+def test_deleting_and_clearing_documents():
+    documents, _, _ = create_store()
+    documents.add(['a.yaml', 'b.yaml'])
+    documents.hold('a.yaml')
+
+    del documents['a.yaml']
+
+    assert 'a.yaml' not in documents
+    assert list(documents) == ['b.yaml']
+
+    documents.clear()
+
+    assert len(documents) == 0
+    assert documents.get('b.yaml') is None
@@ -0,0 +1,60 @@
+import pytest
+
+from cfn_check.cli.utils.files import create_loader
+from cfn_check.evaluation.evaluator import Evaluator
+from cfn_check.rendering import RenderCache
+
+
+TEMPLATE = '''
+AWSTemplateFormatVersion: '2010-09-09'
+Resources:
+  Function:
+    Type: AWS::Lambda::Function
+    Properties:
+      LoggingConfig:
+        LogGroup: !Ref LogGroup
+  LogGroup:
+    Type: AWS::Logs::LogGroup
+'''
+
+
+def load_template():
+    return create_loader('fast').load(TEMPLATE)
+
+
+@pytest.mark.parametrize('memoize', [False, True])
+def test_match_finds_rendered_matches(memoize: bool):
+    evaluator = Evaluator()
+    template = load_template()
+
+    assert [
+        found for _, found in evaluator.match(
+            template,
+            'Resources.*.Type',
+            memoize=memoize,
+        )
+    ] == ['AWS::Lambda::Function', 'AWS::Logs::LogGroup']
+
+
+def test_reference_index_follows_references_when_indexed():
+    evaluator = Evaluator(
+        render_cache=RenderCache(
+            mode='tree',
+            index_references=True,
+        ),
+    )
+
+    index = evaluator.reference_index(load_template())
+
+    assert index.references('Function') == ['LogGroup']
+    assert index.referenced_by('LogGroup') == ['Function']
+
+
+def test_reference_index_raises_for_templates_rendered_without_indexing():
+    evaluator = Evaluator()
+    template = load_template()
+
+    evaluator.match(template, 'Resources')
+
+    with pytest.raises(ValueError, match='index_references'):
+        evaluator.reference_index(template)
@@ -0,0 +1,81 @@
+import os
+
+import pytest
+
+from cfn_check.cli.utils.excludes import ExcludeTrie
+from cfn_check.cli.utils.files import walk_templates
+
+
+@pytest.mark.parametrize(
+    'excludes,path,excluded',
+    [
+        (['/repo/build'], '/repo/build', True),
+        (['/repo/build'], '/repo/build/template.yaml', True),
+        (['/repo/build'], '/repo/builds/template.yaml', False),
+        (['/repo/build'], '/repo', False),
+        (['/repo/*.json'], '/repo/template.json', True),
+        (['/repo/*.json'], '/repo/nested/template.json', False),
+        (['/repo/template-?.yml'], '/repo/template-a.yml', True),
+        (['/repo/template-?.yml'], '/repo/template-ab.yml', False),
+        (['/repo/[ab]'], '/repo/a/template.yaml', True),
+        (['/repo/[ab]'], '/repo/c/template.yaml', False),
+        (['/repo/**/node_modules'], '/repo/node_modules', True),
+        (['/repo/**/node_modules'], '/repo/a/b/node_modules/x.yaml', True),
+        (['/repo/**/node_modules'], '/repo/a/b/modules/x.yaml', False),
+        (['/repo/**/*.tmp.yaml'], '/repo/a/template.tmp.yaml', True),
+        (['/repo/**/*.tmp.yaml'], '/repo/a/template.yaml', False),
+        (['/repo/**'], '/repo/template.yaml', True),
+        (['/other', '/repo/a'], '/repo/a/template.yaml', True),
+        (['/other', '/repo/a'], '/repo/b/template.yaml', False),
+    ],
+)
+def test_exclude_trie_excludes(
+    excludes: list[str],
+    path: str,
+    excluded: bool,
+):
+    assert ExcludeTrie(excludes).excludes(path) is excluded
+
+
+def test_exclude_trie_matches_relative_paths_from_cwd():
+    excludes = ExcludeTrie(['build'])
+
+    assert excludes.excludes(
+        os.path.join(os.getcwd(), 'build', 'template.yaml'),
+    )
+    assert excludes.excludes('build/template.yaml')
+    assert not excludes.excludes('template.yaml')
+
+
+def test_exclude_trie_state_is_empty_when_nothing_below_can_match():
+    excludes = ExcludeTrie(['/repo/build'])
+
+    assert excludes.state('/other') == ()
+    assert excludes.state('/repo') != ()
+
+
+def test_empty_exclude_trie_is_falsy():
+    assert not ExcludeTrie([])
+    assert ExcludeTrie(['/repo'])
+
+
+def test_walk_templates_skips_excluded_directories(tmp_path):
+    for name in [
+        'template.yaml',
+        'build/template.yaml',
+        'nested/template.yml',
+        'nested/node_modules/template.json',
+    ]:
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text('{}')
+
+    excludes = ExcludeTrie([
+        str(tmp_path / 'build'),
+        str(tmp_path / '**' / 'node_modules'),
+    ])
+
+    assert walk_templates(str(tmp_path), exclude=excludes) == [
+        str(tmp_path / 'template.yaml'),
+        str(tmp_path / 'nested' / 'template.yml'),
+    ]
@@ -0,0 +1,175 @@
+import pathlib
+
+import pytest
+
+from cfn_check.cli.utils.files import (
+    create_loader,
+    load_template,
+)
+from cfn_check.yaml.cparser import (
+    CEventParser,
+    CEventParserError,
+)
+from cfn_check.yaml.comments import TaggedScalar
+from cfn_check.yaml.scalarstring import (
+    DoubleQuotedScalarString,
+    SingleQuotedScalarString,
+)
+from cfn_check.yaml.tag import Tag
+
+
+EXAMPLES = pathlib.Path(__file__).parent.parent / 'example'
+
+STACKED_TAGS = '''
+UserData: !Base64 !Ref Script
+'''
+
+QUOTED_STRING_TYPES = (
+    DoubleQuotedScalarString,
+    SingleQuotedScalarString,
+)
+
+TEMPLATE = '''
+AWSTemplateFormatVersion: '2010-09-09'
+Parameters:
+  Environment:
+    Type: String
+    Default: dev
+    AllowedValues: [dev, prod]
+Mappings:
+  Defaults: &defaults
+    Memory: 128
+    Timeout: 3.5
+Conditions:
+  IsProduction: !Equals [!Ref Environment, prod]
+Resources:
+  Function:
+    Type: AWS::Lambda::Function
+    Condition: IsProduction
+    Properties:
+      <<: *defaults
+      FunctionName: !Sub "${Environment}-function"
+      Role: !GetAtt Role.Arn
+      Code:
+        ZipFile: |
+          def handler(event, context):
+              return event
+      Description: >
+        Folded
+        description
+      Tags:
+        - Key: 'quoted'
+          Value: "double"
+        - Key: plain
+          Value: !Join ['-', [!Ref Environment, !Select [0, !GetAZs '']]]
+      Enabled: true
+      Empty: null
+'''
+
+
+def to_comparable(node):
+    '''
+    Reduce a loaded tree to builtins, keeping the node types,
+    tags and scalar styles the fast loader must preserve.
+    '''
+    tag = getattr(node, Tag.attrib, None)
+    tag_value = tag.value if tag is not None else None
+
+    if isinstance(node, dict):
+        return (
+            type(node).__name__,
+            tag_value,
+            [
+                (to_comparable(key), to_comparable(value))
+                for key, value in node.items()
+            ],
+        )
+
+    elif isinstance(node, list):
+        return (
+            type(node).__name__,
+            tag_value,
+            [to_comparable(item) for item in node],
+        )
+
+    elif isinstance(node, TaggedScalar):
+        return (
+            type(node).__name__,
+            tag_value,
+            node.style,
+            to_comparable(node.value),
+        )
+
+    elif isinstance(node, QUOTED_STRING_TYPES):
+        # The fast loader doesn't preserve quotes.
+        return (
+            'str',
+            str(node),
+        )
+
+    return (
+        type(node).__name__,
+        node,
+    )
+
+
+def load(content: str, typ: str, pure: bool = False):
+    return create_loader(typ, pure=pure).load(content)
+
+
+@pytest.mark.parametrize(
+    'path',
+    sorted(EXAMPLES.glob('*.y*ml')),
+    ids=lambda path: path.name,
+)
+def test_fast_constructor_matches_round_trip_for_examples(path: pathlib.Path):
+    content = path.read_text()
+
+    assert to_comparable(load(content, 'fast', pure=True)) == to_comparable(load(content, 'rt'))
+
+
+def test_fast_constructor_matches_round_trip():
+    assert to_comparable(load(TEMPLATE, 'fast', pure=True)) == to_comparable(load(TEMPLATE, 'rt'))
+
+
+def test_fast_constructor_resolves_merge_keys():
+    properties = load(TEMPLATE, 'fast', pure=True)['Resources']['Function']['Properties']
+
+    assert properties['Memory'] == 128
+    assert properties['Timeout'] == 3.5
+
+
+requires_c_parser = pytest.mark.skipif(
+    not CEventParser.available(),
+    reason='_ruamel_yaml is not installed',
+)
+
+
+@requires_c_parser
+@pytest.mark.parametrize(
+    'path',
+    sorted(EXAMPLES.glob('*.y*ml')),
+    ids=lambda path: path.name,
+)
+def test_c_event_parser_matches_round_trip_for_examples(path: pathlib.Path):
+    content = path.read_text()
+
+    assert to_comparable(load_template(content, 'fast')) == to_comparable(load(content, 'rt'))
+
+
+@requires_c_parser
+def test_c_event_parser_matches_round_trip():
+    loader = create_loader('fast')
+
+    assert to_comparable(loader.load(TEMPLATE)) == to_comparable(load(TEMPLATE, 'rt'))
+    assert isinstance(loader.parser, CEventParser)
+
+
+@requires_c_parser
+def test_c_event_parser_rejects_stacked_tags():
+    with pytest.raises(CEventParserError):
+        load(STACKED_TAGS, 'fast')
+
+
+def test_load_template_retries_stacked_tags_with_pure_parser():
+    assert to_comparable(load_template(STACKED_TAGS, 'fast')) == to_comparable(load(STACKED_TAGS, 'rt'))
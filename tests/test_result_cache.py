@@ -0,0 +1,130 @@
+import pathlib
+
+from cfn_check import Collection, Rule
+from cfn_check.cli.utils.cache import create_result_cache
+from cfn_check.cli.utils.files import hash_template, load_document
+from cfn_check.cli.utils.rules import create_validation_set
+from cfn_check.collection.document_store import DocumentStore
+
+
+FUNCTION = '''
+AWSTemplateFormatVersion: '2010-09-09'
+Resources:
+  Function:
+    Type: AWS::Lambda::Function
+    Properties:
+      LogGroup: Group
+'''
+
+LOG_GROUP = '''
+AWSTemplateFormatVersion: '2010-09-09'
+Resources:
+  {group}:
+    Type: AWS::Logs::LogGroup
+'''
+
+
+def find_log_group(collection: Collection, group: str):
+    return collection.query(f'Resources.{group}')
+
+
+class LogGroupLookups(Collection):
+
+    def has_log_group(self, group: str):
+        return len(self.documents) > 0 and bool(find_log_group(self, group))
+
+
+class LogGroupChecks(LogGroupLookups):
+
+    # Neither rule reads other documents directly, so only running
+    # them shows their results depend on other templates.
+    @Rule('Resources.*', 'Functions log to a group through a helper')
+    def validate_helper(self, resource: dict):
+        if resource.get('Type') == 'AWS::Lambda::Function':
+            assert find_log_group(self, resource['Properties']['LogGroup']), '❌ No log group'
+
+    @Rule('Resources.*', 'Functions log to a group through a base class')
+    def validate_base_class(self, resource: dict):
+        if resource.get('Type') == 'AWS::Lambda::Function':
+            assert self.has_log_group(resource['Properties']['LogGroup']), '❌ No log group'
+
+    @Rule('Resources.*.Type', 'Resources have types')
+    def validate_type(self, resource_type: str):
+        assert isinstance(resource_type, str)
+
+
+def validate(
+    cache_dir: str,
+    paths: list[str],
+):
+    rules = {
+        'LogGroupChecks': LogGroupChecks(),
+    }
+
+    result_cache = create_result_cache(cache_dir)
+    validation_set = create_validation_set(
+        rules,
+        result_cache=result_cache,
+    )
+
+    documents = DocumentStore(
+        loader=lambda path: load_document(path, typ='fast'),
+    )
+    documents.add(paths)
+
+    for rule in rules.values():
+        rule.use_documents(documents)
+
+    template_keys = {
+        path: hash_template(path) for path in paths
+    }
+
+    result_cache.set_documents(
+        list(template_keys.items()),
+    )
+
+    failed = [
+        (path, validator.name)
+        for path in paths
+        for validator, _ in validation_set.evaluate(
+            documents[path],
+            key=template_keys[path],
+        )
+    ]
+
+    return (
+        failed,
+        result_cache,
+    )
+
+
+def test_results_of_rules_reading_other_documents_track_them(tmp_path: pathlib.Path):
+    cache_dir = str(tmp_path / 'cache')
+
+    function_path = tmp_path / 'function.yml'
+    function_path.write_text(FUNCTION)
+
+    group_path = tmp_path / 'group.yml'
+    group_path.write_text(LOG_GROUP.format(group='Group'))
+
+    paths = [str(function_path), str(group_path)]
+
+    (failed, result_cache) = validate(cache_dir, paths)
+    assert failed == []
+    assert result_cache.evaluated == 6
+
+    (failed, result_cache) = validate(cache_dir, paths)
+    assert failed == []
+    assert result_cache.cached == 6
+
+    # Only the other template changes, so rules that didn't read
+    # it while validating the function's template stay cached.
+    group_path.write_text(LOG_GROUP.format(group='OtherGroup'))
+
+    (failed, result_cache) = validate(cache_dir, paths)
+    assert failed == [
+        (str(function_path), 'Functions log to a group through a base class'),
+        (str(function_path), 'Functions log to a group through a helper'),
+    ]
+    assert result_cache.cached == 1
+    assert result_cache.evaluated == 5
@@ -0,0 +1,77 @@
+import asyncio
+import pathlib
+
+from cfn_check.cli.utils.server import ValidationServer
+
+
+ALPHA_RULES = '''
+from cfn_check import Collection, Rule
+
+
+class AlphaRules(Collection):
+
+    @Rule("Resources", "alpha")
+    def validate_alpha(self, value: dict):
+        assert False, '❌ Alpha always fails'
+'''
+
+BETA_RULES = '''
+from cfn_check import Collection, Rule
+
+
+class BetaRules(Collection):
+
+    @Rule("Resources", "beta")
+    def validate_beta(self, value: dict):
+        assert value is not None
+'''
+
+TEMPLATE = '''
+AWSTemplateFormatVersion: '2010-09-09'
+Resources:
+  Topic:
+    Type: AWS::SNS::Topic
+'''
+
+
+def write_file(path: pathlib.Path, content: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+
+    return str(path)
+
+
+def test_server_validates_with_only_the_requested_rules(tmp_path: pathlib.Path):
+    alpha_path = write_file(tmp_path / 'served_alpha' / 'rules.py', ALPHA_RULES)
+    beta_path = write_file(tmp_path / 'served_beta' / 'other.py', BETA_RULES)
+    template_path = write_file(tmp_path / 'templates' / 'template.yml', TEMPLATE)
+
+    server = ValidationServer(
+        socket_path=str(tmp_path / 'cfn-check.sock'),
+    )
+
+    def validate(rules_path: str):
+        return asyncio.run(
+            server.handle({
+                'command': 'validate',
+                'cwd': str(tmp_path),
+                'args': {
+                    'paths': [template_path],
+                    'rules_path': rules_path,
+                },
+            })
+        )
+
+    alpha = validate(alpha_path)
+    assert alpha['validation_count'] == 1
+    assert 'Rule: alpha failed' in alpha['errors']
+
+    beta = validate(beta_path)
+    assert beta.get('error') is None
+    assert beta['validation_count'] == 1
+    assert beta['errors'] is None
+
+    # Rules served earlier are kept warm, still without the other's
+    alpha = validate(alpha_path)
+    assert alpha['validation_count'] == 1
+    assert 'Rule: beta' not in alpha['errors']
@@ -0,0 +1,171 @@
+from typing import Annotated, Any, Optional
+
+import pytest
+from pydantic import BaseModel, ConfigDict, field_validator
+
+from cfn_check.validation.snapshot import SnapshotCache
+from cfn_check.validation.validator import Validator, find_adapted_types
+
+
+class Resource(BaseModel):
+    Type: str
+
+    @field_validator('Type')
+    @classmethod
+    def check_type(cls, value: str):
+        if value == 'raises':
+            raise TypeError('Type raised')
+
+        return value
+
+
+class Tagged(BaseModel):
+    Tags: dict[str, Any]
+
+
+class Open(BaseModel):
+    model_config = ConfigDict(extra='allow')
+
+    Type: str
+
+
+def check_resource(resource: Resource):
+    assert resource.Type != 'AWS::S3::Bucket', '❌ Buckets are not allowed'
+
+
+def check_resources(resources: list[Resource]):
+    assert len(resources) < 2, '❌ Too many resources'
+
+
+FOUND = [
+    ('Resources::Function', {'Type': 'AWS::Lambda::Function'}),
+    ('Resources::Bucket', {'Type': 'AWS::S3::Bucket'}),
+    ('Resources::Invalid', {'Type': 1}),
+    ('Resources::Missing', {'Properties': {}}),
+    ('Resources::Raises', {'Type': 'raises'}),
+    ('Resources::Scalar', 'AWS::SNS::Topic'),
+]
+
+
+def as_results(results):
+    return [
+        (type(result).__name__, str(result))
+        for result in results
+    ]
+
+
+@pytest.mark.parametrize(
+    'found',
+    [
+        FOUND,
+        FOUND[:1],
+        [match for match in FOUND if match[0] != 'Resources::Raises'],
+        [match for match in FOUND if match[0] == 'Resources::Raises'],
+        [],
+    ],
+)
+@pytest.mark.parametrize(
+    'snapshots',
+    [None, SnapshotCache()],
+)
+def test_call_batch_matches_call(
+    found: list[tuple[str, Any]],
+    snapshots: SnapshotCache | None,
+):
+    validator = Validator(check_resource, 'Resources::*', 'Check resources')
+
+    assert validator.batched
+
+    assert as_results(validator.call_batch(found, snapshots=snapshots)) == as_results(
+        validator(match, snapshots=snapshots) for match in found
+    )
+
+
+def test_call_batch_matches_call_for_list_models():
+    validator = Validator(check_resources, 'Resources', 'Check resources')
+    found = [
+        ('Resources', [{'Type': 'AWS::Lambda::Function'}]),
+        ('Resources', [{'Type': 'AWS::Lambda::Function'}, {'Type': 'AWS::S3::Bucket'}]),
+        ('Resources', [{'Type': 1}]),
+        ('Resources', [{'Type': 'raises'}]),
+    ]
+
+    assert as_results(validator.call_batch(found)) == as_results(
+        validator(match) for match in found
+    )
+
+
+def test_call_batch_reports_errors_for_each_failing_match():
+    validator = Validator(check_resource, 'Resources::*', 'Check resources')
+
+    results = list(validator.call_batch(FOUND))
+
+    assert results[0] is None
+    assert 'Buckets are not allowed' in str(results[1])
+    assert 'Validation Error' in str(results[2])
+    assert 'Validation Error' in str(results[3])
+    assert 'Type raised' in str(results[4])
+    assert str(results[5]).startswith('Path: Resources::Scalar\nError:')
+
+
+def check_tagged(tagged: Tagged):
+    pass
+
+
+def check_open(resource: Open):
+    pass
+
+
+@pytest.mark.parametrize(
+    'func,uses_snapshots',
+    [
+        (check_resource, True),
+        (check_resources, True),
+        (check_tagged, False),
+        (check_open, False),
+    ],
+)
+def test_validator_uses_snapshots_only_without_shared_input(
+    func,
+    uses_snapshots: bool,
+):
+    assert Validator(func, 'Resources::*', 'Check').uses_snapshots is uses_snapshots
+
+
+def check_resource_or_list(resource: Resource):
+    if isinstance(resource, list):
+        assert all(isinstance(item, dict) for item in resource), '❌ Not a list of resources'
+        return
+
+    assert resource.Type != 'AWS::S3::Bucket', '❌ Buckets are not allowed'
+
+
+def test_list_matches_are_passed_as_is_to_model_annotations():
+    validator = Validator(check_resource_or_list, 'Resources::*', 'Check resources')
+    found = [
+        ('Resources::Function', {'Type': 'AWS::Lambda::Function'}),
+        ('Resources::List', [{'Type': 1}, {'Properties': {}}]),
+    ]
+
+    assert validator(found[1]) is None
+    assert list(validator.call_batch(found)) == [None, None]
+
+
+@pytest.mark.parametrize(
+    'annotation,adapted_types',
+    [
+        (Resource, (dict,)),
+        (dict[str, Resource], (dict,)),
+        (list[Resource], (list,)),
+        (Resource | None, (dict,)),
+        (Optional[list[Resource]], (list,)),
+        (Resource | list[Resource], (dict, list)),
+        (Annotated[list[Resource], 'resources'], (list,)),
+        (str, ()),
+    ],
+)
+def test_find_adapted_types(
+    annotation: Any,
+    adapted_types: tuple[type, ...],
+):
+    assert find_adapted_types(annotation) == adapted_types
@@ -0,0 +1,131 @@
+import asyncio
+import pathlib
+
+import pytest
+
+from cfn_check.cli.utils.files import load_templates
+from cfn_check.cli.utils.rules import create_validation_set, import_rules
+from cfn_check.cli.utils.workers import validate_with_workers
+from cfn_check.collection.document_store import DocumentStore
+from cfn_check.evaluation.errors import (
+    assemble_error_messages,
+    format_validation_result,
+)
+from cfn_check.evaluation.result import ValidationResult
+
+
+RULES = '''
+from cfn_check import Collection, Rule
+
+
+class LogGroupChecks(Collection):
+
+    @Rule("Resources.*", "Functions log to a group defined in some template")
+    def validate_log_group(self, resource: dict):
+        if resource.get('Type') != 'AWS::Lambda::Function':
+            return
+
+        group = resource['Properties']['LogGroup']
+        assert self.query(f"Resources.{group}"), f'❌ No log group {group}'
+'''
+
+FUNCTION = '''
+AWSTemplateFormatVersion: '2010-09-09'
+Resources:
+  Function:
+    Type: AWS::Lambda::Function
+    Properties:
+      LogGroup: {group}
+'''
+
+LOG_GROUP = '''
+AWSTemplateFormatVersion: '2010-09-09'
+Resources:
+  {group}:
+    Type: AWS::Logs::LogGroup
+'''
+
+
+@pytest.fixture
+def cross_document_templates(tmp_path: pathlib.Path):
+    rules_path = tmp_path / 'cross_document_rules' / 'rules.py'
+    rules_path.parent.mkdir()
+    rules_path.write_text(RULES)
+
+    templates = tmp_path / 'templates'
+    templates.mkdir()
+
+    # Each template's function logs to a group defined in another
+    # template, except the last, whose group isn't defined at all.
+    (templates / 'a.yml').write_text(FUNCTION.format(group='GroupB'))
+    (templates / 'b.yml').write_text(LOG_GROUP.format(group='GroupB'))
+    (templates / 'c.yml').write_text(LOG_GROUP.format(group='GroupD'))
+    (templates / 'd.yml').write_text(FUNCTION.format(group='Missing'))
+
+    return (
+        str(rules_path),
+        sorted(str(path) for path in templates.iterdir()),
+    )
+
+
+async def validate_in_process(
+    paths: list[str],
+    rules_path: str,
+):
+    # As the CLI validates without workers
+    rules = {
+        name: collection()
+        for name, collection in import_rules(rules_path).items()
+    }
+
+    validation_set = create_validation_set(rules)
+
+    templates = await load_templates(paths, typ='fast')
+
+    documents = DocumentStore()
+    documents.update(templates)
+
+    for rule in rules.values():
+        rule.use_documents(documents)
+
+    return assemble_error_messages([
+        format_validation_result(
+            ValidationResult.from_error(
+                validator,
+                err,
+                template=path,
+            )
+        )
+        for path, data in templates
+        for validator, err in validation_set.evaluate(data)
+    ])
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_workers_see_every_template_in_cross_document_queries(
+    cross_document_templates: tuple[str, list[str]],
+    workers: int,
+):
+    (rules_path, paths) = cross_document_templates
+
+    (
+        templates_evaluated,
+        validation_error,
+        _,
+        _,
+    ) = asyncio.run(
+        validate_with_workers(
+            paths,
+            rules_path,
+            workers,
+        )
+    )
+
+    expected = asyncio.run(
+        validate_in_process(paths, rules_path),
+    )
+
+    assert templates_evaluated == 4
+    assert str(validation_error) == str(expected)
+    assert 'No log group Missing' in str(validation_error)
+    assert 'No log group GroupB' not in str(validation_error)